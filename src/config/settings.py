@@ -9,6 +9,24 @@ class Settings(BaseSettings):
     ACTIVATION_TOKEN_EXPIRE_HOURS: int = 24
     PASSWORD_RESET_TOKEN_EXPIRE_HOURS: int = 1
     ENVIRONMENT: str = "production"
+    # Per worker process: workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) must stay
+    # below PostgreSQL's max_connections. With many workers, put PgBouncer in
+    # transaction mode in front and set DB_NULL_POOL instead.
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_NULL_POOL: bool = False
+    DB_POOL_PREWARM: bool = True
+    PASSWORD_HASH_AUTOTUNE: bool = True
+    PASSWORD_HASH_TARGET_MS: int = 300
+    # Argon2id memory cost (MiB): used as-is when autotuning is off, the
+    # autotune floor otherwise, and the level below which stored hashes are
+    # upgraded at login. Only lower it for test runs, where hash strength
+    # does not matter.
+    PASSWORD_HASH_MEMORY_MIB: int = 46
+    REDIS_URL: str | None = None
 
     class Config:
         env_file = ".env"
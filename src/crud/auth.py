@@ -1,66 +1,196 @@
 from sqlalchemy.future import select
-from sqlalchemy import delete
+from sqlalchemy import bindparam, delete, exists, lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timedelta
-import secrets
+from datetime import datetime, timedelta, timezone
+import os
+from typing import Final, NamedTuple
 
+import orjson
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+
+from src.database import dialect
 from src.database.models.user import (
     User, UserGroup, ActivationToken, PasswordResetToken, RefreshToken
 )
-from src.utils.hash import hash_password
+from src.utils.hash import hash_password_async
+from src.utils.redis_client import redis_client as _redis
 from src.config.settings import settings
 
+ACTIVATION_TOKEN_TTL: Final = timedelta(hours=settings.ACTIVATION_TOKEN_EXPIRE_HOURS)
+REFRESH_TOKEN_TTL: Final = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+PASSWORD_RESET_TOKEN_TTL: Final = timedelta(hours=settings.PASSWORD_RESET_TOKEN_EXPIRE_HOURS)
+
+# Runs on every logout; build it once.
+_REVOKE_REFRESH_TOKEN = (
+    delete(RefreshToken).where(RefreshToken.token == bindparam("token")).returning(RefreshToken.user_id)
+)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
 
 async def get_user_by_email(db: AsyncSession, email: str):
-    q = await db.execute(select(User).where(User.email == email))
+    # lambda_stmt caches the built statement by code location; ``email`` is
+    # extracted as a bound parameter on each call.
+    q = await db.execute(lambda_stmt(lambda: select(User).where(User.email == email)))
     return q.scalars().first()
 
 
+class UserCredentials(NamedTuple):
+    """Detached login-relevant columns of a user row, safe to share across sessions."""
+    id: int
+    email: str
+    hashed_password: str
+    is_active: bool
+
+
+# Keyed by the exact email (the lookup is case-sensitive too). Only active
+# users are cached: unknown and not-yet-activated addresses can change state
+# at any moment, so they always go to the database.
+#
+# The entry carries the password hash, so a password change must reach every
+# worker at once: with Redis configured it is the only tier, and
+# invalidate_cached_credentials() deletes the shared key. Without Redis the
+# process-local cache below stands in, as for the other caches.
+_CREDENTIALS_TTL: Final = 10
+_credentials_cache: TTLCache = TTLCache(maxsize=50_000, ttl=_CREDENTIALS_TTL)
+
+
+def _credentials_key(email: str) -> str:
+    return f"auth:credentials:{email}"
+
+
+async def _get_cached_credentials(email: str) -> UserCredentials | None:
+    if _redis is None:
+        return _credentials_cache.get(email)
+    try:
+        cached = await _redis.get(_credentials_key(email))
+    except RedisError:
+        return None
+    return UserCredentials(*orjson.loads(cached)) if cached is not None else None
+
+
+async def _cache_credentials(creds: UserCredentials) -> None:
+    if _redis is None:
+        _credentials_cache[creds.email] = creds
+        return
+    try:
+        await _redis.set(_credentials_key(creds.email), orjson.dumps(list(creds)), ex=_CREDENTIALS_TTL)
+    except RedisError:
+        pass
+
+
+async def invalidate_cached_credentials(email: str) -> None:
+    if _redis is None:
+        _credentials_cache.pop(email, None)
+        return
+    try:
+        await _redis.delete(_credentials_key(email))
+    except RedisError:
+        pass
+
+
+async def get_user_credentials(db: AsyncSession, email: str):
+    creds = await _get_cached_credentials(email)
+    if creds is not None:
+        return creds
+    q = await db.execute(lambda_stmt(
+        lambda: select(User.id, User.email, User.hashed_password, User.is_active).where(User.email == email)
+    ))
+    row = q.first()
+    if row is None:
+        return None
+    creds = UserCredentials(*row)
+    if creds.is_active:
+        await _cache_credentials(creds)
+    return creds
+
+
+# Group name -> id. Groups are never renamed or deleted, so an entry only
+# goes stale if the table is wiped underneath us; the TTL bounds that.
+_group_ids: TTLCache = TTLCache(maxsize=16, ttl=300)
+
+
+async def _get_group_id(db: AsyncSession, group_name: str) -> int:
+    group_id = _group_ids.get(group_name)
+    if group_id is not None:
+        return group_id
+    # The group almost always exists; only write when it does not.
+    select_group_id = select(UserGroup.id).where(UserGroup.name == group_name)
+    group_id = await db.scalar(select_group_id)
+    if group_id is not None:
+        _group_ids[group_name] = group_id
+        return group_id
+    # Not cached yet: the insert is uncommitted and may still be rolled back.
+    group_id = await db.scalar(
+        dialect.insert(db)(UserGroup).values(name=group_name).on_conflict_do_nothing().returning(UserGroup.id)
+    )
+    if group_id is None:
+        group_id = await db.scalar(select_group_id)
+    return group_id
+
+
 async def create_user(db: AsyncSession, email: str, password: str, group_name: str = "USER"):
-    existing = await get_user_by_email(db, email)
-    if existing:
+    # Cheap check first, so a taken address does not pay for a hash.
+    if await db.scalar(select(exists().where(User.email == email))):
+        return None
+    hashed = await hash_password_async(password)
+    group_id = await _get_group_id(db, group_name)
+    # A concurrent registration can still take the address after the check
+    # above; the unique index on users.email has the final say.
+    user = await db.scalar(
+        dialect.insert(db)(User)
+        .values(email=email, hashed_password=hashed, group_id=group_id)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+    if user is None:
+        await db.rollback()
         return None
-    hashed = hash_password(password)
-    q = await db.execute(select(UserGroup).where(UserGroup.name == group_name))
-    group = q.scalars().first()
-    if not group:
-        group = UserGroup(name=group_name)
-        db.add(group)
-        await db.flush()
-    user = User(email=email, hashed_password=hashed, group_id=group.id)
-    db.add(user)
     await db.commit()
-    await db.refresh(user)
+    await invalidate_cached_credentials(email)
     return user
 
 
+async def _upsert_user_token(db: AsyncSession, model, user_id: int, token: str, expires: datetime):
+    # One row per user: replace the previous token in place instead of delete + insert.
+    stmt = dialect.insert(db)(model).values(user_id=user_id, token=token, expires_at=expires)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[model.user_id],
+        set_={"token": stmt.excluded.token, "expires_at": stmt.excluded.expires_at},
+    ).returning(model)
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    return result.scalar_one()
+
+
 async def create_activation_token(db: AsyncSession, user: User):
-    token = secrets.token_urlsafe(32)
-    expires = datetime.now() + timedelta(hours=settings.ACTIVATION_TOKEN_EXPIRE_HOURS)
-    await db.execute(delete(ActivationToken).where(ActivationToken.user_id == user.id))
-    at = ActivationToken(user_id=user.id, token=token, expires_at=expires)
-    db.add(at)
+    token = os.urandom(32).hex()
+    expires = _now() + ACTIVATION_TOKEN_TTL
+    at = await _upsert_user_token(db, ActivationToken, user.id, token, expires)
     await db.commit()
-    await db.refresh(at)
     return at
 
 
 async def verify_activation_token(db: AsyncSession, token: str):
-    q = await db.execute(select(ActivationToken).where(ActivationToken.token == token))
-    at = q.scalars().first()
-    if not at or at.expires_at < datetime.now():
-        return None
-    user_q = await db.execute(select(User).where(User.id == at.user_id))
-    user = user_q.scalars().first()
+    now = _now()
+    q = await db.execute(lambda_stmt(
+        lambda: select(User)
+        .join(ActivationToken, ActivationToken.user_id == User.id)
+        .where(ActivationToken.token == token, ActivationToken.expires_at >= now)
+    ))
+    user = q.scalars().first()
     if user:
         user.is_active = True
         await db.execute(delete(ActivationToken).where(ActivationToken.user_id == user.id))
         await db.commit()
+        await invalidate_cached_credentials(user.email)
     return user
 
 
 async def create_refresh_token(db: AsyncSession, user_id: int):
-    token, expires = secrets.token_urlsafe(64), datetime.now() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    token, expires = os.urandom(64).hex(), _now() + REFRESH_TOKEN_TTL
     rt = RefreshToken(user_id=user_id, token=token, expires_at=expires)
     db.add(rt)
     await db.commit()
@@ -69,29 +199,29 @@ async def create_refresh_token(db: AsyncSession, user_id: int):
 
 
 async def revoke_refresh_token(db: AsyncSession, token: str):
-    await db.execute(delete(RefreshToken).where(RefreshToken.token == token))
+    user_id = await db.scalar(_REVOKE_REFRESH_TOKEN, {"token": token})
     await db.commit()
+    return user_id
 
 
 async def get_refresh_token(db: AsyncSession, token: str):
-    q = await db.execute(select(RefreshToken).where(RefreshToken.token == token))
+    q = await db.execute(lambda_stmt(lambda: select(RefreshToken).where(RefreshToken.token == token)))
     return q.scalars().first()
 
 
 async def create_password_reset_token(db: AsyncSession, user: User):
-    token = secrets.token_urlsafe(32)
-    expires = datetime.now() + timedelta(hours=settings.PASSWORD_RESET_TOKEN_EXPIRE_HOURS)
-    await db.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == user.id))
-    pr = PasswordResetToken(user_id=user.id, token=token, expires_at=expires)
-    db.add(pr)
+    token = os.urandom(32).hex()
+    expires = _now() + PASSWORD_RESET_TOKEN_TTL
+    pr = await _upsert_user_token(db, PasswordResetToken, user.id, token, expires)
     await db.commit()
-    await db.refresh(pr)
     return pr
 
 
 async def verify_password_reset_token(db: AsyncSession, token: str):
-    q = await db.execute(select(PasswordResetToken).where(PasswordResetToken.token == token))
-    pr = q.scalars().first()
-    if not pr or pr.expires_at < datetime.now():
-        return None
-    return pr.user
+    now = _now()
+    q = await db.execute(lambda_stmt(
+        lambda: select(User)
+        .join(PasswordResetToken, PasswordResetToken.user_id == User.id)
+        .where(PasswordResetToken.token == token, PasswordResetToken.expires_at >= now)
+    ))
+    return q.scalars().first()
@@ -0,0 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import dialect
+from src.database.models.cart import Cart
+
+
+async def get_or_create_cart_id(db: AsyncSession, user_id: int) -> int:
+    # carts.user_id is unique; the no-op DO UPDATE makes RETURNING yield the
+    # existing row too, so this is one atomic statement either way.
+    stmt = dialect.insert(db)(Cart).values(user_id=user_id)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Cart.user_id],
+        set_={"user_id": stmt.excluded.user_id},
+    ).returning(Cart.id)
+    return await db.scalar(stmt)
@@ -0,0 +1,53 @@
+from collections.abc import Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, load_only
+
+from src.database.models.movies import Movie
+
+
+def build_search_doc(
+    name: str, description: str, genres: Iterable[str], stars: Iterable[str], directors: Iterable[str]
+) -> str:
+    """Lower-cased text ``q`` is matched against; one field per line so matches never span two fields."""
+    return "\n".join([name, description, *genres, *stars, *directors]).lower()
+
+
+async def backfill_search_docs(db: AsyncSession, batch_size: int = 500) -> int:
+    """Fill ``Movie.search_doc`` for rows that predate the column; returns the number of movies updated.
+
+    Every movie has at least a name, so an empty document only ever means
+    "not built yet" and the pass is idempotent.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        movies = (await db.scalars(
+            select(Movie)
+            .options(
+                load_only(Movie.id, Movie.name, Movie.description),
+                selectinload(Movie.genres), selectinload(Movie.stars), selectinload(Movie.directors),
+            )
+            .where(Movie.search_doc == "", Movie.id > last_id)
+            .order_by(Movie.id)
+            .limit(batch_size)
+        )).all()
+        if not movies:
+            return updated
+        await db.execute(update(Movie), [
+            {
+                "id": movie.id,
+                "search_doc": build_search_doc(
+                    movie.name,
+                    movie.description,
+                    [genre.name for genre in movie.genres],
+                    [star.name for star in movie.stars],
+                    [director.name for director in movie.directors],
+                ),
+            }
+            for movie in movies
+        ])
+        await db.commit()
+        updated += len(movies)
+        last_id = movies[-1].id
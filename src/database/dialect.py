@@ -0,0 +1,13 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def insert(db: AsyncSession):
+    """Return the dialect-specific ``insert`` construct bound to ``db``.
+
+    Both the SQLite and PostgreSQL variants support ``on_conflict_do_*`` and
+    ``RETURNING``, which the generic ``sqlalchemy.insert`` does not.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
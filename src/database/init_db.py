@@ -0,0 +1,21 @@
+import asyncio
+
+import src.main  # noqa: F401  (imports every model, so Base.metadata is complete)
+from src.crud.movies import backfill_search_docs
+from src.database.models.base import Base
+from src.database.session import AsyncSessionLocal, engine
+
+
+async def init_db():
+    # create_all only adds missing tables; it never alters existing ones.
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # Movies loaded without going through create_movie (seed data, imports)
+    # have an empty search_doc and would never match ``q``.
+    async with AsyncSessionLocal() as db:
+        await backfill_search_docs(db)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(init_db())
@@ -1,11 +1,13 @@
 import enum
 import uuid as uuid_pkg
 
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DECIMAL, UniqueConstraint, Table, Enum, \
-    DateTime, func
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, DECIMAL, UniqueConstraint, Table, \
+    DateTime, func, CheckConstraint, LargeBinary, FetchedValue, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from src.database.models.base import Base
 from src.database.models.orders import OrderItem
+from src.database.models.triggers import touch_updated_at
+from src.database.models.types import SmallIntEnum
 
 movie_genres = Table(
     "movie_genres", Base.metadata,
@@ -57,11 +59,21 @@ class Certification(Base):
 class Movie(Base):
     __tablename__ = "movies"
     __table_args__ = (
-        UniqueConstraint("name", "year", "time", name="uix_movie_name_year_time"),
+        UniqueConstraint("name", "year", name="uix_movie_name_year"),
+        # (sort column, id) indexes back the keyset pagination in list_movies;
+        # the name variant is an expression index, declared below the class.
+        Index("ix_movies_year_id", "year", "id"),
+        Index("ix_movies_imdb_id", "imdb", "id"),
+        Index("ix_movies_price_id", "price", "id"),
+        Index("ix_movies_votes_id", "votes", "id"),
+        # year equality plus an imdb range, the common filter combination.
+        Index("ix_movies_year_imdb", "year", "imdb"),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    uuid: Mapped[str] = mapped_column(String, default=lambda: str(uuid_pkg.uuid4()), unique=True, nullable=False)
+    uuid: Mapped[bytes] = mapped_column(
+        LargeBinary(16), default=lambda: uuid_pkg.uuid4().bytes, unique=True, nullable=False
+    )
     name: Mapped[str] = mapped_column(String(250), nullable=False)
     year: Mapped[int] = mapped_column(nullable=False)
     time: Mapped[int] = mapped_column(nullable=False)
@@ -72,34 +84,61 @@ class Movie(Base):
     description: Mapped[str] = mapped_column(Text, nullable=False)
     price: Mapped[float] = mapped_column(DECIMAL(10, 2))
     certification_id: Mapped[int] = mapped_column(ForeignKey("certifications.id"), nullable=False)
+    # Lower-cased name, description and genre/star/director names, written by
+    # create_movie (and by backfill_search_docs in init_db for other rows);
+    # the target of list_movies' ``q`` search.
+    search_doc: Mapped[str] = mapped_column(Text, nullable=False, server_default="")
+
+    # Every relationship must be loaded explicitly (selectinload/joinedload);
+    # an implicit lazy load would be one extra query per movie in a list.
+    reactions = relationship("MovieReaction", back_populates="movie", lazy="raise")
+    comments = relationship("Comment", back_populates="movie", cascade="all, delete-orphan", lazy="raise")
+
+    certification = relationship("Certification", backref="movies", lazy="raise")
+    genres = relationship("Genre", secondary="movie_genres", backref="movies", lazy="raise")
+    directors = relationship("Director", secondary="movie_directors", backref="movies", lazy="raise")
+    stars = relationship("Star", secondary="movie_stars", backref="movies", lazy="raise")
+
+    cart_items: Mapped[list["CartItem"]] = relationship(
+        back_populates="movie", cascade="all, delete-orphan", lazy="raise"
+    )
+    purchases: Mapped[list["Purchase"]] = relationship(back_populates="movie", lazy="raise")
 
-    reactions = relationship("MovieReaction", back_populates="movie")
-    comments = relationship("Comment", back_populates="movie", cascade="all, delete-orphan")
+    order_items: Mapped[list["OrderItem"]] = relationship(back_populates="movie", lazy="raise")
 
-    certification = relationship("Certification", backref="movies")
-    genres = relationship("Genre", secondary="movie_genres", backref="movies")
-    directors = relationship("Director", secondary="movie_directors", backref="movies")
-    stars = relationship("Star", secondary="movie_stars", backref="movies")
 
-    cart_items: Mapped[list["CartItem"]] = relationship(back_populates="movie", cascade="all, delete-orphan")
-    purchases: Mapped[list["Purchase"]] = relationship(back_populates="movie")
+Index("ix_movies_lower_name_id", func.lower(Movie.name), Movie.id)
+
+# PostgreSQL matches q with full-text search over this expression; queries
+# must use the very same expression (config as a literal, not a bound
+# parameter) for the GIN index to be picked. Other backends LIKE-scan.
+SEARCH_CONFIG = text("'english'")
+movie_search_vector = func.to_tsvector(SEARCH_CONFIG, Movie.search_doc)
+Index("ix_movies_search_tsv", movie_search_vector, postgresql_using="gin").ddl_if(dialect="postgresql")
 
-    order_items: Mapped[list["OrderItem"]] = relationship(back_populates="movie")
 
 class ReactionType(enum.Enum):
     like = "like"
     dislike = "dislike"
 
 
+REACTION_CODES = {ReactionType.dislike: 0, ReactionType.like: 1}
+
+
 class MovieReaction(Base):
     __tablename__ = "movie_reactions"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     movie_id = Column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), nullable=False)
-    reaction = Column(Enum(ReactionType), nullable=False)
+    reaction = Column(SmallIntEnum(ReactionType, REACTION_CODES), nullable=False)
 
-    __table_args__ = (UniqueConstraint("user_id", "movie_id", name="uix_user_movie"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "movie_id", name="uix_user_movie"),
+        CheckConstraint("reaction IN (0, 1)", name="ck_movie_reaction_code"),
+        # Covers the per-movie reaction counts with an index-only scan.
+        Index("ix_movie_reactions_movie_reaction", "movie_id", "reaction"),
+    )
 
     user = relationship("User", back_populates="reactions")
     movie = relationship("Movie", back_populates="reactions")
@@ -113,11 +152,22 @@ class Comment(Base):
     movie_id = Column(Integer, ForeignKey("movies.id", ondelete="CASCADE"), nullable=False)
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_onupdate=FetchedValue())
 
-    user = relationship("User", back_populates="comments")
-    movie = relationship("Movie", back_populates="comments")
-    reactions = relationship("CommentReaction", back_populates="comment", cascade="all, delete-orphan")
+    user = relationship("User", back_populates="comments", lazy="raise")
+    movie = relationship("Movie", back_populates="comments", lazy="raise")
+    reactions = relationship(
+        "CommentReaction", back_populates="comment", cascade="all, delete-orphan", lazy="raise"
+    )
+
+    # created_at comes back with the INSERT (RETURNING) instead of a refresh.
+    __mapper_args__ = {"eager_defaults": True}
+
+
+# Backs the per-movie comment pages, which seek and order on id.
+Index("ix_comments_movie_id_id", Comment.movie_id, Comment.id)
+
+touch_updated_at(Comment.__table__)
 
 
 class CommentReaction(Base):
@@ -126,9 +176,12 @@ class CommentReaction(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     comment_id = Column(Integer, ForeignKey("comments.id", ondelete="CASCADE"), nullable=False)
-    reaction = Column(Enum(ReactionType), nullable=False)
+    reaction = Column(SmallIntEnum(ReactionType, REACTION_CODES), nullable=False)
 
-    __table_args__ = (UniqueConstraint("user_id", "comment_id", name="uix_user_comment"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "comment_id", name="uix_user_comment"),
+        CheckConstraint("reaction IN (0, 1)", name="ck_comment_reaction_code"),
+    )
 
     user = relationship("User")
     comment = relationship("Comment", back_populates="reactions")
@@ -1,10 +1,11 @@
 from datetime import datetime
 import enum
 
-from sqlalchemy import ForeignKey, DECIMAL, Enum, DateTime, func, text
+from sqlalchemy import ForeignKey, DECIMAL, DateTime, func, text, CheckConstraint, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.database.models.base import Base
+from src.database.models.types import SmallIntEnum
 
 class OrderStatusesEnum(str, enum.Enum):
     Pending = "Pending"
@@ -12,8 +13,26 @@ class OrderStatusesEnum(str, enum.Enum):
     Canceled = "Canceled"
 
 
+ORDER_STATUS_CODES = {
+    OrderStatusesEnum.Pending: 0,
+    OrderStatusesEnum.Paid: 1,
+    OrderStatusesEnum.Canceled: 2,
+}
+
+
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        CheckConstraint("status IN (0, 1, 2)", name="ck_order_status_code"),
+        # Keyset pages of the admin listing seek on (sort column, id).
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_user_id_id", "user_id", "id"),
+        # The default created_at sort under a user or status filter reads these
+        # in order and stops at LIMIT; b-trees scan either way, so no DESC.
+        Index("ix_orders_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_orders_status_created_at", "status", "created_at", "id"),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     created_at: Mapped[datetime] = mapped_column(
@@ -22,7 +41,9 @@ class Order(Base):
         default=func.now(),
         server_default=text("(datetime('now'))")
     )
-    status: Mapped[OrderStatusesEnum] = mapped_column(Enum(OrderStatusesEnum), nullable=False)
+    status: Mapped[OrderStatusesEnum] = mapped_column(
+        SmallIntEnum(OrderStatusesEnum, ORDER_STATUS_CODES), nullable=False
+    )
     total_amount: Mapped[float] = mapped_column(DECIMAL(10, 2), nullable=False)
 
     user: Mapped["User"] = relationship(back_populates="orders")
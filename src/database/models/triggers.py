@@ -0,0 +1,22 @@
+from sqlalchemy import DDL, Table, event
+
+
+def touch_updated_at(table: Table) -> None:
+    """Have the database refresh ``table.updated_at`` on every UPDATE.
+
+    The trigger is created together with the table, so no Python-side
+    ``onupdate`` value has to travel with each UPDATE statement.
+    """
+    name = table.name
+    event.listen(table, "after_create", DDL(
+        f"CREATE TRIGGER trg_{name}_updated_at AFTER UPDATE ON {name} "
+        f"BEGIN UPDATE {name} SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id; END"
+    ).execute_if(dialect="sqlite"))
+    event.listen(table, "after_create", DDL(
+        "CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$ "
+        "BEGIN NEW.updated_at = now(); RETURN NEW; END; $$ LANGUAGE plpgsql"
+    ).execute_if(dialect="postgresql"))
+    event.listen(table, "after_create", DDL(
+        f"CREATE TRIGGER trg_{name}_updated_at BEFORE UPDATE ON {name} "
+        f"FOR EACH ROW EXECUTE FUNCTION set_updated_at()"
+    ).execute_if(dialect="postgresql"))
@@ -0,0 +1,31 @@
+import enum
+
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+
+class SmallIntEnum(TypeDecorator):
+    """Persist a Python enum as a SMALLINT code instead of a VARCHAR label.
+
+    ``codes`` maps every member to its stored integer; the API keeps working with
+    the enum members themselves.
+    """
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class: type[enum.Enum], codes: dict[enum.Enum, int]):
+        super().__init__()
+        self.enum_class = enum_class
+        self.codes = tuple(codes.items())
+        self._to_code = dict(self.codes)
+        self._from_code = {code: member for member, code in self.codes}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self._to_code[self.enum_class(value)]
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._from_code[value]
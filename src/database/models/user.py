@@ -1,10 +1,10 @@
 from sqlalchemy import (
-    Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Enum, UniqueConstraint
+    Column, Integer, String, Boolean, ForeignKey, DateTime, Text, Enum, UniqueConstraint, Index, FetchedValue, func
 )
 from sqlalchemy.orm import relationship, Mapped
-from datetime import datetime
 import enum
 from src.database.models.base import Base
+from src.database.models.triggers import touch_updated_at
 
 
 class GenderEnum(enum.Enum):
@@ -32,8 +32,8 @@ class User(Base):
     email = Column(String(320), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime, default=datetime.now)
-    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue())
     group_id = Column(Integer, ForeignKey("user_groups.id"), nullable=False)
 
     group = relationship("UserGroup", back_populates="users")
@@ -53,6 +53,9 @@ class User(Base):
     purchases = relationship("Purchase", back_populates="user")
 
 
+touch_updated_at(User.__table__)
+
+
 class UserProfile(Base):
     __tablename__ = "user_profiles"
     id = Column(Integer, primary_key=True)
@@ -69,20 +72,26 @@ class UserProfile(Base):
 
 class ActivationToken(Base):
     __tablename__ = "activation_tokens"
+    # Covers the token -> (expiry, owner) lookup in verify_activation_token, so
+    # the expiry filter is answered from the index without touching the table.
+    # A partial "expires_at > now()" index is not possible: SQLite and
+    # PostgreSQL both reject non-deterministic functions in index predicates.
+    __table_args__ = (Index("ix_activation_tokens_token_live", "token", "expires_at", "user_id"),)
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
     token = Column(String(255), unique=True, nullable=False, index=True)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
 
     user = relationship("User", back_populates="activation_token")
 
 
 class PasswordResetToken(Base):
     __tablename__ = "password_reset_tokens"
+    __table_args__ = (Index("ix_password_reset_tokens_token_live", "token", "expires_at", "user_id"),)
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
     token = Column(String(255), unique=True, nullable=False, index=True)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
 
     user = relationship("User", back_populates="password_reset_token")
 
@@ -92,6 +101,6 @@ class RefreshToken(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     token = Column(String(255), unique=True, nullable=False, index=True)
-    expires_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
 
     user = relationship("User", back_populates="refresh_tokens")
@@ -1,10 +1,77 @@
+from contextlib import AsyncExitStack
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from src.config.settings import settings
 
-engine = create_async_engine(settings.DATABASE_URL, future=True, echo=False)
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+# asyncpg: JIT compilation only adds planning latency to these short OLTP queries.
+ASYNCPG_CONNECT_ARGS = {"server_settings": {"jit": "off"}}
+
+database_url = make_url(settings.DATABASE_URL)
+connect_args = ASYNCPG_CONNECT_ARGS if database_url.get_driver_name() == "asyncpg" else {}
+
+if settings.DB_NULL_POOL:
+    # An external pooler (PgBouncer in transaction mode) owns the connections.
+    # Prepared statements do not survive its connection switching, so both
+    # asyncpg's and SQLAlchemy's statement caches are turned off.
+    if database_url.get_driver_name() == "asyncpg":
+        database_url = database_url.update_query_dict({"prepared_statement_cache_size": "0"})
+        connect_args = {**connect_args, "statement_cache_size": 0}
+    pool_kwargs = {"poolclass": NullPool}
+else:
+    pool_kwargs = {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+engine = create_async_engine(
+    database_url,
+    future=True,
+    echo=False,
+    connect_args=connect_args,
+    **pool_kwargs,
+)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers share the warm page cache with the single writer and
+    # turns per-commit fsyncs into amortized checkpoints.
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+
+
+async def warm_pool(size: int = settings.DB_POOL_SIZE):
+    # Check out ``size`` connections at once so each one is actually opened
+    # (handshake, auth, dialect setup), then hand them all back to the pool.
+    async with AsyncExitStack() as stack:
+        for _ in range(size):
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.execute(text("SELECT 1"))
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
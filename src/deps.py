@@ -1,17 +1,40 @@
+from typing import NamedTuple
+
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import lambda_stmt
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.session import get_db
-from src.utils.jwt import decode_token
-from src.database.models.user import User
+from src.utils.jwt_cache import decode_token_cached
+from src.database.models.user import User, UserGroup, UserGroupEnum
 from sqlalchemy.future import select
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+class CurrentUser(NamedTuple):
+    """Detached snapshot of the authenticated user, safe to share across sessions."""
+    id: int
+    email: str
+    is_active: bool
+    group_id: int
+    group_name: str
+
+
+# Keyed by user id. The short TTL bounds how long another worker's change
+# (deactivation, group change) can go unnoticed by this process.
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    _user_cache.pop(user_id, None)
+
+
+async def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
+    """User id from a verified access token, without touching the database."""
     try:
-        payload = decode_token(token)
+        payload = decode_token_cached(token)
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
     if payload.get("type") != "access":
@@ -19,15 +42,29 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     user_id = payload.get("user_id")
     if user_id is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
-    q = await db.execute(select(User).where(User.id == user_id))
-    user = q.scalars().first()
-    if user is None:
+    return user_id
+
+
+async def get_current_user(user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)):
+    user = _user_cache.get(user_id)
+    if user is not None:
+        return user
+    q = await db.execute(lambda_stmt(
+        lambda: select(User.id, User.email, User.is_active, User.group_id, UserGroup.name)
+        .join(UserGroup, User.group_id == UserGroup.id)
+        .where(User.id == user_id)
+    ))
+    row = q.first()
+    if row is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user = CurrentUser(*row)
+    _user_cache[user_id] = user
     return user
 
 
 def get_current_admin(user=Depends(get_current_user)):
-    if user.group_id == 1:
+    # Plain users are turned away; moderators keep the admin routes, as before.
+    if user.group_name == UserGroupEnum.USER.value:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to access this resource."
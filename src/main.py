@@ -1,17 +1,37 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
 from src.config.settings import settings
 from src.database.models.base import Base
-from src.database.session import engine
+from src.database.session import engine, warm_pool
 from src.routes.auth import router as auth_router
 from src.routes.movies import router as movie_router
 from src.routes.cart import router as cart_router
 from src.routes.orders import router as orders_router
+from src.utils.hash import autotune_password_hasher
+from src.utils.redis_client import close_redis
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.PASSWORD_HASH_AUTOTUNE:
+        # Seconds of blocking Argon2 hashing; keep the event loop free meanwhile.
+        await asyncio.get_running_loop().run_in_executor(None, autotune_password_hasher)
+    if settings.DB_POOL_PREWARM and not settings.DB_NULL_POOL:
+        await warm_pool()
+    yield
+    await close_redis()
+
 
 if settings.ENVIRONMENT == "production":
-    app = FastAPI(docs_url=None, redoc_url=None)
+    app = FastAPI(docs_url=None, redoc_url=None, lifespan=lifespan, default_response_class=ORJSONResponse)
 else:
     app = FastAPI(
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
         title="Online Cinema API",
         description="An API for managing an online cinema platform, including user authentication, movie listings, shopping carts and orders",
         openapi_tags=[
@@ -0,0 +1,20 @@
+from src.crud import auth as crud
+from src.database.session import AsyncSessionLocal
+# from src.emailer import send_email
+
+
+# These run as BackgroundTasks after the response is sent, so they open their
+# own session instead of borrowing the (already closed) request one.
+
+async def send_activation_email(user) -> None:
+    async with AsyncSessionLocal() as db:
+        at = await crud.create_activation_token(db, user)
+    link = f"https://your-frontend/activate?token={at.token}"
+    # await send_email(user.email, "Activate your account", f"Click to activate: {link}")
+
+
+async def send_password_reset_email(user) -> None:
+    async with AsyncSessionLocal() as db:
+        pr = await crud.create_password_reset_token(db, user)
+    link = f"https://your-frontend/reset-password?token={pr.token}"
+    # await send_email(user.email, "Reset your password", f"Click to reset: {link}")
@@ -1,24 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select, delete
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from sqlalchemy import delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models.user import PasswordResetToken, User
 from src.database.session import get_db
-from src.deps import get_current_user
+from src.deps import get_current_user, invalidate_cached_user
 from src.schemas import auth as schemas
 from src.crud import auth as crud
-# from src.emailer import send_email
+from src.notifications.email import send_activation_email, send_password_reset_email
 from src.schemas.auth import ChangePasswordRequest
-from src.utils.hash import verify_password, hash_password
+from src.utils.hash import verify_password_async, hash_password_async, password_needs_rehash
 from src.utils.jwt import create_access_token, create_refresh_token, decode_token
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from src.config.settings import settings
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 
 @router.post("/register", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED,)
-async def register(payload: schemas.RegisterRequest, db: AsyncSession = Depends(get_db)):
+async def register(payload: schemas.RegisterRequest, background_tasks: BackgroundTasks,
+                   db: AsyncSession = Depends(get_db)):
     """
     **Register a new user account.**
 
@@ -30,13 +31,10 @@ async def register(payload: schemas.RegisterRequest, db: AsyncSession = Depends(
     - **Returns:**
       - The details of the newly created user (excluding the password).
     """
-    existing = await crud.get_user_by_email(db, payload.email)
-    if existing:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
     user = await crud.create_user(db, email=payload.email, password=payload.password)
-    at = await crud.create_activation_token(db, user)
-    link = f"https://your-frontend/activate?token={at.token}"
-    # await send_email(user.email, "Activate your account", f"Click to activate: {link}")
+    if not user:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
+    background_tasks.add_task(send_activation_email, user)
     return user
 
 
@@ -63,7 +61,8 @@ async def activate(token: str, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/resend-activation")
-async def resend_activation(payload: schemas.ResendActivationRequest, db: AsyncSession = Depends(get_db)):
+async def resend_activation(payload: schemas.ResendActivationRequest, background_tasks: BackgroundTasks,
+                            db: AsyncSession = Depends(get_db)):
     """
     **Resend the activation email.**
 
@@ -72,14 +71,12 @@ async def resend_activation(payload: schemas.ResendActivationRequest, db: AsyncS
     - **Returns:**
       - `dict`: A confirmation message.
     """
-    user = await crud.get_user_by_email(db, payload.email)
+    user = await crud.get_user_credentials(db, payload.email)
     if not user:
         return {"detail": "If the email is registered, activation email was sent"}
     if user.is_active:
         return {"detail": "Account already active"}
-    at = await crud.create_activation_token(db, user)
-    link = f"https://your-frontend/activate?token={at.token}"
-    # await send_email(user.email, "Activate your account", f"Click to activate: {link}")
+    background_tasks.add_task(send_activation_email, user)
     return {"detail": "Activation email sent"}
 
 
@@ -97,11 +94,16 @@ async def login(payload: schemas.LoginRequest, db: AsyncSession = Depends(get_db
     - **Returns:**
       - `TokenResponse`: An object containing the access, refresh tokens and ticket type.
     """
-    user = await crud.get_user_by_email(db, payload.email)
-    if not user or not verify_password(payload.password, user.hashed_password):
+    user = await crud.get_user_credentials(db, payload.email)
+    if not user or not await verify_password_async(payload.password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account not activated")
+    if password_needs_rehash(user.hashed_password):
+        # Upgrade while the plaintext is at hand; committed with the refresh token below.
+        new_hash = await hash_password_async(payload.password)
+        await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+        await crud.invalidate_cached_credentials(user.email)
     access_payload = {"user_id": user.id, "email": user.email}
     access_token = create_access_token(access_payload)
     rt = await crud.create_refresh_token(db, user.id)
@@ -124,7 +126,11 @@ async def refresh(payload: schemas.RefreshRequest, db: AsyncSession = Depends(ge
     token_row = await crud.get_refresh_token(db, payload.refresh_token)
     if not token_row:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
-    if token_row.expires_at < __import__("datetime").datetime.utcnow():
+    expires_at = token_row.expires_at
+    if expires_at.tzinfo is None:
+        # SQLite hands back naive datetimes; the stored values are UTC.
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at < datetime.now(timezone.utc):
         await crud.revoke_refresh_token(db, token_row.token)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token expired")
     access_payload = {"user_id": token_row.user_id}
@@ -142,12 +148,15 @@ async def logout(payload: schemas.RefreshRequest, db: AsyncSession = Depends(get
     - **Returns:**
       - `dict`: A confirmation message.
     """
-    await crud.revoke_refresh_token(db, payload.refresh_token)
+    user_id = await crud.revoke_refresh_token(db, payload.refresh_token)
+    if user_id is not None:
+        invalidate_cached_user(user_id)
     return {"detail": "Logged out"}
 
 
 @router.post("/forgot-password")
-async def forgot_password(payload: schemas.ResetPasswordRequest, db: AsyncSession = Depends(get_db)):
+async def forgot_password(payload: schemas.ResetPasswordRequest, background_tasks: BackgroundTasks,
+                          db: AsyncSession = Depends(get_db)):
     """
     **Request a password reset.**
 
@@ -157,12 +166,10 @@ async def forgot_password(payload: schemas.ResetPasswordRequest, db: AsyncSessio
     - **Returns:**
       - Confirmation message.
     """
-    user = await crud.get_user_by_email(db, payload.email)
+    user = await crud.get_user_credentials(db, payload.email)
     if not user or not user.is_active:
         return {"detail": "If the email is registered, a reset link was sent"}
-    pr = await crud.create_password_reset_token(db, user)
-    link = f"https://your-frontend/reset-password?token={pr.token}"
-    # await send_email(user.email, "Reset your password", f"Click to reset: {link}")
+    background_tasks.add_task(send_password_reset_email, user)
     return {"detail": "If the email is registered, a reset link was sent"}
 
 
@@ -179,17 +186,14 @@ async def reset_password(payload: schemas.ResetPasswordConfirmRequest, db: Async
     - **Returns:**
       - `dict`: A confirmation message.
     """
-    q = await db.execute(select(PasswordResetToken).where(PasswordResetToken.token == payload.token))
-    pr = q.scalars().first()
-    if not pr or pr.expires_at < __import__("datetime").datetime.utcnow():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token")
-    user_q = await db.execute(select(User).where(User.id == pr.user_id))
-    user = user_q.scalars().first()
+    user = await crud.verify_password_reset_token(db, payload.token)
     if not user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
-    user.hashed_password = hash_password(payload.new_password)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token")
+    user.hashed_password = await hash_password_async(payload.new_password)
     await db.execute(delete(PasswordResetToken).where(PasswordResetToken.user_id == user.id))
     await db.commit()
+    invalidate_cached_user(user.id)
+    await crud.invalidate_cached_credentials(user.email)
     return {"detail": "Password updated"}
 
 
@@ -207,9 +211,11 @@ async def change_password(payload: ChangePasswordRequest, current_user=Depends(g
     - **Returns:**
       - `dict`: A confirmation message.
     """
-    from src.utils.hash import verify_password, hash_password
-    if not verify_password(payload.old_password, current_user.hashed_password):
+    user = await db.get(User, current_user.id)
+    if not await verify_password_async(payload.old_password, user.hashed_password):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Old password is incorrect")
-    current_user.hashed_password = hash_password(payload.new_password)
+    user.hashed_password = await hash_password_async(payload.new_password)
     await db.commit()
+    invalidate_cached_user(user.id)
+    await crud.invalidate_cached_credentials(user.email)
     return {"detail": "Password changed"}
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, delete, exists
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.crud import cart as crud
+from src.database import dialect
 from src.database.models.cart import Cart, CartItem, Purchase
 from src.database.models.movies import Movie
 from src.database.session import get_db
-from src.deps import get_current_user
+from src.deps import get_current_user_id
 from src.schemas.cart import CartSchema, CartResponse
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, joinedload
 
 router = APIRouter(prefix="/cart", tags=["cart"])
 
@@ -14,7 +16,7 @@ router = APIRouter(prefix="/cart", tags=["cart"])
 @router.get("/", response_model=CartSchema)
 async def get_cart(
         db: AsyncSession = Depends(get_db),
-        user=Depends(get_current_user)
+        user_id: int = Depends(get_current_user_id)
 ):
     """
     **Retrieve the user's cart.**
@@ -24,29 +26,30 @@ async def get_cart(
     - **Returns:**
       - `CartSchema`: An object containing the cart ID and a list of all items.
     """
+    # Cart, items and movies come back in one joined SELECT; only the
+    # many-to-many genres need a second (IN) query.
     stmt = (
         select(Cart)
-        .where(Cart.user_id == user.id)
-        .options(selectinload(Cart.items).selectinload(CartItem.movie).selectinload(Movie.genres))
+        .where(Cart.user_id == user_id)
+        .options(joinedload(Cart.items).joinedload(CartItem.movie).selectinload(Movie.genres))
     )
     result = await db.execute(stmt)
-    cart = result.scalar_one_or_none()
+    cart = result.unique().scalar_one_or_none()
 
     if not cart:
-        cart = Cart(user_id=user.id)
-        db.add(cart)
+        cart_id = await crud.get_or_create_cart_id(db, user_id)
         await db.commit()
-        await db.refresh(cart)
-        return CartSchema(id=cart.id, items=[])
+        return {"id": cart_id, "items": []}
 
-    return CartSchema(id=cart.id, items=cart.items)
+    # response_model validates the ORM object straight from attributes.
+    return cart
 
 
 @router.post("/add/{movie_id}", response_model=CartResponse)
 async def add_movie_to_cart(
         movie_id: int,
         db: AsyncSession = Depends(get_db),
-        user=Depends(get_current_user)
+        user_id: int = Depends(get_current_user_id)
 ):
     """
     **Add a movie to the cart.**
@@ -63,45 +66,42 @@ async def add_movie_to_cart(
     - **Returns:**
       - `CartResponse`: A confirmation message.
     """
-    # Check if the movie exists first
-    movie_stmt = select(Movie).where(Movie.id == movie_id)
-    movie = await db.scalar(movie_stmt)
-    if not movie:
+    # Movie existence, prior purchase and the cart id come back in one row.
+    checks_stmt = select(
+        exists().where(Movie.id == movie_id).label("movie_exists"),
+        exists().where(
+            Purchase.user_id == user_id,
+            Purchase.movie_id == movie_id
+        ).label("purchased"),
+        select(Cart.id).where(Cart.user_id == user_id).scalar_subquery().label("cart_id"),
+    )
+    movie_exists, purchased, cart_id = (await db.execute(checks_stmt)).one()
+    if not movie_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Movie not found."
         )
-    # Check if the movie has already been purchased by the user
-    purchased_stmt = select(Purchase).where(
-        Purchase.user_id == user.id,
-        Purchase.movie_id == movie_id
-    )
-    purchased_movie = await db.scalar(purchased_stmt)
-    if purchased_movie:
+    if purchased:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You have already purchased this movie."
         )
 
-    cart_stmt = select(Cart).where(Cart.user_id == user.id)
-    cart = await db.scalar(cart_stmt)
-    if not cart:
-        cart = Cart(user_id=user.id)
-        db.add(cart)
-        await db.flush()
+    if cart_id is None:
+        cart_id = await crud.get_or_create_cart_id(db, user_id)
 
-    cart_item_stmt = select(CartItem).where(
-        CartItem.cart_id == cart.id,
-        CartItem.movie_id == movie_id
+    # The (cart_id, movie_id) unique constraint makes the add idempotent;
+    # no RETURNING row means the movie was already in the cart.
+    insert_item_stmt = (
+        dialect.insert(db)(CartItem)
+        .values(cart_id=cart_id, movie_id=movie_id)
+        .on_conflict_do_nothing(index_elements=[CartItem.cart_id, CartItem.movie_id])
+        .returning(CartItem.id)
     )
-    existing_item = await db.scalar(cart_item_stmt)
-    if existing_item:
-        return {"message": "Movie is already in the cart."}
-
-    new_item = CartItem(cart_id=cart.id, movie_id=movie_id)
-    db.add(new_item)
+    new_item_id = await db.scalar(insert_item_stmt)
     await db.commit()
-    await db.refresh(new_item)
+    if new_item_id is None:
+        return {"message": "Movie is already in the cart."}
 
     return {"message": "Movie successfully added to cart."}
 
@@ -110,7 +110,7 @@ async def add_movie_to_cart(
 async def remove_movie_from_cart(
         movie_id: int,
         db: AsyncSession = Depends(get_db),
-        user=Depends(get_current_user)
+        user_id: int = Depends(get_current_user_id)
 ):
     """
     **Remove a movie from the cart.**
@@ -126,29 +126,25 @@ async def remove_movie_from_cart(
     - **Returns:**
       - `CartResponse`: A confirmation message.
     """
-    # Get the user's cart
-    cart_stmt = select(Cart).where(Cart.user_id == user.id)
-    cart = await db.scalar(cart_stmt)
-    if not cart:
+    # Get the user's cart id; the row itself is never needed
+    cart_id = await db.scalar(select(Cart.id).where(Cart.user_id == user_id))
+    if cart_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cart not found."
         )
 
-    # Find the specific item in the cart
-    cart_item_stmt = select(CartItem).where(
-        CartItem.cart_id == cart.id,
-        CartItem.movie_id == movie_id
+    # Delete the item directly; no returned id means it was not in the cart
+    removed_id = await db.scalar(
+        delete(CartItem)
+        .where(CartItem.cart_id == cart_id, CartItem.movie_id == movie_id)
+        .returning(CartItem.id)
     )
-    cart_item = await db.scalar(cart_item_stmt)
-    if not cart_item:
+    if removed_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Movie not found in cart."
         )
-
-    # Delete the item
-    await db.delete(cart_item)
     await db.commit()
 
     return {"message": "Movie successfully removed from cart."}
@@ -159,7 +155,7 @@ async def remove_movie_from_cart(
 @router.post("/pay", response_model=CartResponse)
 async def pay_for_cart(
         db: AsyncSession = Depends(get_db),
-        user=Depends(get_current_user)
+        user_id: int = Depends(get_current_user_id)
 ):
     """
     **Pay for all movies in the cart.**
@@ -175,8 +171,8 @@ async def pay_for_cart(
     # Get the user's cart and its items
     cart_stmt = (
         select(Cart)
-        .where(Cart.user_id == user.id)
-        .options(selectinload(Cart.items).selectinload(CartItem.movie))
+        .where(Cart.user_id == user_id)
+        .options(selectinload(Cart.items))
     )
     cart = await db.scalar(cart_stmt)
     if not cart or not cart.items:
@@ -187,14 +183,17 @@ async def pay_for_cart(
 
     # pay logic
 
-    # Move items from cart to purchases
-    for item in cart.items:
-        new_purchase = Purchase(user_id=user.id, movie_id=item.movie_id)
-        db.add(new_purchase)
+    # Move items from cart to purchases in one executemany INSERT; the
+    # (user_id, movie_id) unique constraint turns a repeat into a no-op.
+    await db.execute(
+        dialect.insert(db)(Purchase).on_conflict_do_nothing(
+            index_elements=[Purchase.user_id, Purchase.movie_id]
+        ),
+        [{"user_id": user_id, "movie_id": item.movie_id} for item in cart.items]
+    )
 
-    # Clear the cart by deleting the items
-    for item in cart.items:
-        await db.delete(item)
+    # Clear the cart with a single DELETE
+    await db.execute(delete(CartItem).where(CartItem.cart_id == cart.id))
 
     await db.commit()
 
@@ -204,7 +203,7 @@ async def pay_for_cart(
 @router.delete("/clear", response_model=CartResponse)
 async def clear_cart(
         db: AsyncSession = Depends(get_db),
-        user=Depends(get_current_user)
+        user_id: int = Depends(get_current_user_id)
 ):
     """
     **Clear the entire cart.**
@@ -217,23 +216,16 @@ async def clear_cart(
     - **Returns:**
       - `CartResponse`: A confirmation message.
     """
-    # Find the user's cart and items
-    cart_stmt = (
-        select(Cart)
-        .where(Cart.user_id == user.id)
-        .options(selectinload(Cart.items))
-    )
-    cart = await db.scalar(cart_stmt)
-    if not cart:
+    # Only the cart id is needed; the items are never loaded
+    cart_id = await db.scalar(select(Cart.id).where(Cart.user_id == user_id))
+    if cart_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cart not found."
         )
 
     # Delete all items in the cart
-    if cart.items:
-        for item in cart.items:
-            await db.delete(item)
-        await db.commit()
+    await db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
+    await db.commit()
 
     return {"message": "Cart successfully cleared."}
@@ -1,24 +1,254 @@
+import base64
+from decimal import Decimal
+from functools import cache
 from typing import Literal
-
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func, or_, exists
+from urllib.parse import urlencode
+from uuid import UUID
+
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel
+from sqlalchemy import Table, select, insert, update, delete, func, exists, lambda_stmt, text, tuple_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, aliased
-
-from src.database.models.movies import Movie, Genre, Star, Director, movie_genres, movie_stars, movie_directors, \
-    ReactionType, MovieReaction, Comment, CommentReaction
+from sqlalchemy.orm import selectinload, joinedload, load_only, raiseload, aliased
+from sqlalchemy.orm.attributes import set_committed_value
+
+from src.crud.movies import build_search_doc
+from src.database import dialect
+from src.database.models.movies import Movie, Genre, Star, Director, Certification, \
+    ReactionType, MovieReaction, Comment, CommentReaction, movie_genres, movie_stars, movie_directors, \
+    movie_search_vector, SEARCH_CONFIG
 from src.database.models.user import User
 from src.database.session import get_db
 from src.deps import get_current_user
 from src.schemas import movies as schemas
 from src.schemas.movies import MovieSchema, MovieListSchema, CommentCreate, CommentSchema, CommentResponse
+from src.utils.reaction_counters import ReactionCounters
+from src.utils.response_cache import ResponseCache
 
 router = APIRouter(prefix="/movies", tags=["movies"])
 
+@cache
+def movie_detail_options() -> tuple:
+    """Loader options for everything ``MovieSchema`` reads, and nothing else.
+
+    ``raiseload("*")`` turns any relationship a serializer touches without it
+    being listed here into an error instead of a hidden per-row query, and
+    ``load_only`` does the same for columns, leaving out the wide search text.
+    Built on first use: creating the options configures the mappers, which
+    must wait until every model module has been imported.
+    """
+    return (
+        load_only(
+            Movie.id, Movie.uuid, Movie.name, Movie.year, Movie.time, Movie.imdb, Movie.votes,
+            Movie.description, Movie.price, Movie.certification_id,
+            raiseload=True,
+        ),
+        selectinload(Movie.genres).raiseload("*"),
+        selectinload(Movie.stars).raiseload("*"),
+        selectinload(Movie.directors).raiseload("*"),
+        joinedload(Movie.certification).raiseload("*"),
+        raiseload("*"),
+    )
+
+# Serialized JSON bodies of the read endpoints, shared through Redis when it
+# is configured. Movies are never edited after creation, so details can live
+# long; lists are dropped on writes.
+_movie_cache = ResponseCache("movies:movie", maxsize=10_000, ttl=3600)
+_movie_list_cache = ResponseCache("movies:list", maxsize=1_000, ttl=60)
+
+# Like/dislike totals, adjusted by the reaction endpoints as they write. The
+# short TTL bounds how long a stale backfill or a lost update can be served.
+_movie_reaction_counts = ReactionCounters("movie", ttl=300)
+_comment_reaction_counts = ReactionCounters("comment", ttl=300)
+
+
+def _counter_name(reaction: ReactionType | None) -> str | None:
+    return f"{reaction.value}s" if reaction is not None else None
+
+
+async def _set_reaction(
+        db: AsyncSession, model, target_column, target_id: int, user_id: int, reaction: ReactionType
+) -> tuple[bool, ReactionType | None]:
+    """Store ``user_id``'s ``reaction`` on the target; returns whether it changed and what it replaced.
+
+    The reaction being replaced is derived from which write took effect
+    instead of a prior SELECT, so concurrent requests by the same user can
+    never both report the same transition and double-count it.
+    """
+    inserted = await db.scalar(
+        dialect.insert(db)(model)
+        .values({target_column: target_id, model.user_id: user_id, model.reaction: reaction})
+        .on_conflict_do_nothing(index_elements=[model.user_id, target_column])
+        .returning(model.id)
+    )
+    if inserted is not None:
+        return True, None
+
+    # The row exists: flip it, unless it already holds this reaction. The
+    # WHERE is re-checked under the row lock, so only one request flips it.
+    flipped = await db.scalar(
+        update(model)
+        .where(model.user_id == user_id, target_column == target_id, model.reaction != reaction)
+        .values(reaction=reaction)
+        .returning(model.id)
+    )
+    if flipped is None:
+        return False, reaction
+    # Reactions are binary, so the replaced one is the other kind.
+    return True, ReactionType.dislike if reaction is ReactionType.like else ReactionType.like
+
+
+# Planner row estimates per table name; cheap, but no need to ask every request.
+_row_estimates: TTLCache = TTLCache(maxsize=16, ttl=300)
+
+
+async def _approx_total(db: AsyncSession, table: Table) -> int | None:
+    """Planner row estimate for ``table`` from pg_class (PostgreSQL only), or None.
+
+    Constant time regardless of table size, unlike ``count(*)``; good enough
+    for an unfiltered page count.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    if table.name not in _row_estimates:
+        # to_regclass resolves the name through search_path, like the ORM's
+        # own queries, rather than matching any schema's table of that name.
+        estimate = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": table.name},
+        )
+        # -1 until the table has been vacuumed or analyzed.
+        _row_estimates[table.name] = estimate if estimate is not None and estimate >= 0 else None
+    return _row_estimates[table.name]
+
+
+def _json_response(body: bytes) -> Response:
+    return Response(content=body, media_type="application/json")
+
+
+def _schema_response(model: BaseModel) -> Response:
+    """Serialize a schema the handler built itself, skipping FastAPI's
+    second validation pass through ``response_model``.
+
+    ``response_model`` stays on the route for the OpenAPI docs only.
+    """
+    return _json_response(model.model_dump_json().encode())
+
+
+# Names sort case-insensitively; numeric columns sort by value.
+_SORT_KEYS = {
+    "name": func.lower(Movie.name),
+    "year": Movie.year,
+    "imdb": Movie.imdb,
+    "price": Movie.price,
+    "votes": Movie.votes,
+}
+
+
+# Only what MovieListItemSchema serializes; the wide description column stays
+# in the table, and no Movie objects are built for a list page.
+_LIST_COLUMNS = (
+    Movie.id,
+    Movie.uuid,
+    Movie.name,
+    Movie.year,
+    Movie.time,
+    Movie.imdb,
+    Movie.votes,
+    Movie.price,
+    Movie.certification_id,
+    Certification.name.label("certification_name"),
+)
+
+
+async def _genres_by_movie(db: AsyncSession, movie_ids: list[int]) -> dict[int, list[dict]]:
+    """Genres of ``movie_ids`` from one IN query over the association table."""
+    result = await db.execute(lambda_stmt(
+        lambda: select(movie_genres.c.movie_id, Genre.id, Genre.name)
+        .join(Genre, Genre.id == movie_genres.c.genre_id)
+        .where(movie_genres.c.movie_id.in_(movie_ids))
+    ))
+    genres: dict[int, list[dict]] = {movie_id: [] for movie_id in movie_ids}
+    for movie_id, genre_id, genre_name in result:
+        genres[movie_id].append({"id": genre_id, "name": genre_name})
+    return genres
+
+
+def _movie_list_item(row, genres: list[dict]) -> dict:
+    """``MovieListItemSchema``-shaped JSON data built from a ``_LIST_COLUMNS`` row.
+
+    The rows come from our own database, so per-field validation buys nothing
+    on the list endpoint.
+    """
+    movie = row._mapping
+    certification_id = movie["certification_id"]
+    return {
+        "id": movie["id"],
+        "uuid": str(UUID(bytes=movie["uuid"])),
+        "name": movie["name"],
+        "year": movie["year"],
+        "time": movie["time"],
+        "imdb": movie["imdb"],
+        "votes": movie["votes"],
+        "price": float(movie["price"]),
+        "certification_id": certification_id,
+        "certification": (
+            {"id": certification_id, "name": movie["certification_name"]}
+            if movie["certification_name"] is not None else None
+        ),
+        "genres": genres,
+    }
+
+
+def _encode_cursor(sort_value, movie_id: int) -> str:
+    if isinstance(sort_value, Decimal):
+        sort_value = str(sort_value)
+    return base64.urlsafe_b64encode(orjson.dumps([sort_value, movie_id])).decode()
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_finite_decimal(value) -> bool:
+    if not isinstance(value, str):
+        return False
+    try:
+        return Decimal(value).is_finite()
+    except ArithmeticError:
+        return False
+
+
+# What a decoded cursor's sort value must look like for each sort_by, so a
+# crafted cursor is rejected here rather than failing inside the driver.
+_CURSOR_VALUE_CHECKS = {
+    "name": lambda value: isinstance(value, str),
+    "year": _is_int,
+    "votes": _is_int,
+    "imdb": lambda value: _is_int(value) or isinstance(value, float),
+    "price": _is_finite_decimal,
+}
+
+
+def _decode_cursor(cursor: str, sort_by: str) -> tuple:
+    invalid = HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    try:
+        sort_value, movie_id = orjson.loads(base64.urlsafe_b64decode(cursor))
+    except (ValueError, TypeError):
+        raise invalid
+    if not _CURSOR_VALUE_CHECKS[sort_by](sort_value) or not _is_int(movie_id):
+        raise invalid
+    if sort_by == "price":
+        sort_value = Decimal(sort_value)
+    return sort_value, movie_id
+
 
 @router.get("/", response_model=MovieListSchema)
 async def list_movies(
+        request: Request,
         page: int = Query(1, ge=1),
         limit: int = Query(10, ge=1, le=100),
         year: int | None = None,
@@ -28,7 +258,8 @@ async def list_movies(
         db: AsyncSession = Depends(get_db),
         sort_by: Literal["name", "year", "imdb", "price", "votes"] = "name",
         q: str | None = None,
-
+        after: str | None = Query(None, description="Cursor from a previous page's `next_page`."),
+        exact_count: bool = Query(False, description="Count every matching movie for `total_items`."),
 ):
     """
     **List and filter movies.**
@@ -38,6 +269,8 @@ async def list_movies(
     - **Filters:** `year`, `min_rating`, `max_rating`
     - **Sorting:** `sort_by` and `order` parameters
     - **Search:** `q` parameter for full-text search across movie details.
+    - **Pagination:** `page` for numbered pages, or `after` (the cursor in `next_page`) to seek past the previous page.
+    - **Totals:** exact with `exact_count=true` on numbered pages; otherwise a planner estimate for unfiltered lists where available.
 
     - **Raises:**
       - `HTTPException` 404: If no movies match the search and filter criteria.
@@ -45,13 +278,23 @@ async def list_movies(
     - **Returns:**
       - `MovieListSchema`: A paginated list of movies.
     """
+    cache_key = urlencode(sorted(request.query_params.multi_items()))
+    cached = await _movie_list_cache.get(cache_key)
+    if cached is not None:
+        return _json_response(cached)
+
     skip = (page - 1) * limit
-    stmt = select(Movie).options(
-        selectinload(Movie.genres),
-        selectinload(Movie.stars),
-        selectinload(Movie.directors),
-        selectinload(Movie.certification),
-    )
+    sort_key = _SORT_KEYS[sort_by]
+    count_rows = exact_count and after is None
+    if count_rows:
+        # The window count is evaluated over the filtered rows before LIMIT, so
+        # the page and its total come back from the same statement.
+        stmt = select(*_LIST_COLUMNS, sort_key.label("sort_key"), func.count().over().label("total"))
+    else:
+        # By default nothing counts the whole result set; the limit + 1 probe
+        # below is enough to know whether a next page exists.
+        stmt = select(*_LIST_COLUMNS, sort_key.label("sort_key"))
+    stmt = stmt.outerjoin(Certification, Certification.id == Movie.certification_id)
 
     if year:
         stmt = stmt.where(Movie.year == year)
@@ -61,50 +304,63 @@ async def list_movies(
         stmt = stmt.where(Movie.imdb <= max_rating)
 
     if q:
-        stmt = stmt.where(
-            or_(
-                Movie.name.ilike(f"%{q}%"),
-                Movie.description.ilike(f"%{q}%"),
-                exists().where(movie_genres.c.movie_id == Movie.id)
-                .where(Genre.id == movie_genres.c.genre_id)
-                .where(Genre.name.ilike(f"%{q}%")),
-                exists().where(movie_stars.c.movie_id == Movie.id)
-                .where(Star.id == movie_stars.c.star_id)
-                .where(Star.name.ilike(f"%{q}%")),
-                exists().where(movie_directors.c.movie_id == Movie.id)
-                .where(Director.id == movie_directors.c.director_id)
-                .where(Director.name.ilike(f"%{q}%")),
-            )
-        )
-
-    sort_attr = getattr(Movie, sort_by)
-
+        # One predicate over the denormalized search text instead of five
+        # ILIKEs and three correlated EXISTS subqueries.
+        if db.get_bind().dialect.name == "postgresql":
+            stmt = stmt.where(movie_search_vector.op("@@")(func.plainto_tsquery(SEARCH_CONFIG, q)))
+        else:
+            escaped = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            stmt = stmt.where(Movie.search_doc.like(f"%{escaped}%", escape="\\"))
+
+    # Movie.id makes the order total, which the keyset comparison relies on.
+    seek_key = tuple_(sort_key, Movie.id)
     if order == "desc":
-        stmt = stmt.order_by(func.lower(sort_attr).desc())
+        if after is not None:
+            stmt = stmt.where(seek_key < _decode_cursor(after, sort_by))
+        stmt = stmt.order_by(sort_key.desc(), Movie.id.desc())
     else:
-        stmt = stmt.order_by(func.lower(sort_attr).asc())
-
-    total_result = await db.execute(select(func.count(Movie.id)))
-    total = total_result.scalar() or 0
-    total_pages = (total + limit - 1) // limit
-
-    stmt = stmt.offset(skip).limit(limit)
+        if after is not None:
+            stmt = stmt.where(seek_key > _decode_cursor(after, sort_by))
+        stmt = stmt.order_by(sort_key.asc(), Movie.id.asc())
+
+    if after is None:
+        stmt = stmt.offset(skip)
+    # One extra row tells whether there is a next page.
+    stmt = stmt.limit(limit + 1)
     result = await db.execute(stmt)
-    movies = result.scalars().unique().all()
+    rows = result.all()
 
-    if not movies:
+    if not rows:
         raise HTTPException(status_code=404, detail="No movies found.")
 
-    movie_list = [MovieSchema.model_validate(movie) for movie in movies]
+    has_next = len(rows) > limit
+    rows = rows[:limit]
+    genres = await _genres_by_movie(db, [row.id for row in rows])
 
-    response = MovieListSchema(
-        movies=movie_list,
-        prev_page=f"/movies/?page={page - 1}&limit={limit}" if page > 1 else None,
-        next_page=f"/movies/?page={page + 1}&limit={limit}" if page < total_pages else None,
-        total_pages=str(total_pages),
-        total_items=str(total),
-    )
-    return response
+    next_page = None
+    if has_next:
+        params = {k: v for k, v in request.query_params.items() if k not in ("page", "after")}
+        params["after"] = _encode_cursor(rows[-1].sort_key, rows[-1].id)
+        next_page = f"/movies/?{urlencode(params)}"
+
+    if count_rows:
+        total = rows[0].total
+    elif not (year or min_rating is not None or max_rating is not None or q):
+        total = await _approx_total(db, Movie.__table__)
+    else:
+        total = None
+    total_pages = (total + limit - 1) // limit if total is not None else None
+    prev_page = f"/movies/?page={page - 1}&limit={limit}" if after is None and page > 1 else None
+
+    body = orjson.dumps({
+        "movies": [_movie_list_item(row, genres[row.id]) for row in rows],
+        "prev_page": prev_page,
+        "next_page": next_page,
+        "total_pages": str(total_pages) if total_pages is not None else None,
+        "total_items": str(total) if total is not None else None,
+    })
+    await _movie_list_cache.set(cache_key, body)
+    return _json_response(body)
 
 
 @router.get("/{movie_id}", response_model=schemas.MovieSchema)
@@ -123,16 +379,17 @@ async def get_movie(movie_id: int, db: AsyncSession = Depends(get_db)):
     - **Returns:**
       - `MovieSchema`: The detailed movie information.
     """
-    result = await db.execute(
-        select(Movie)
-        .options(
-            selectinload(Movie.genres),
-            selectinload(Movie.stars),
-            selectinload(Movie.directors),
-            selectinload(Movie.certification),
-        )
+    cached = await _movie_cache.get(str(movie_id))
+    if cached is not None:
+        return _json_response(cached)
+
+    # lambda_stmt caches the built statement by code location; ``movie_id`` is
+    # extracted as a bound parameter on each call.
+    result = await db.execute(lambda_stmt(
+        lambda: select(Movie)
+        .options(*movie_detail_options())
         .where(Movie.id == movie_id)
-    )
+    ))
     movie = result.scalars().first()
     if not movie:
         raise HTTPException(
@@ -140,7 +397,51 @@ async def get_movie(movie_id: int, db: AsyncSession = Depends(get_db)):
             detail="Movie with the given ID was not found."
         )
 
-    return MovieSchema.model_validate(movie)
+    body = MovieSchema.model_validate(movie).model_dump_json().encode()
+    await _movie_cache.set(str(movie_id), body)
+    return _json_response(body)
+
+
+# name -> id for genres, stars and directors, per process. Names are never
+# renamed or deleted through the API, so an entry only goes stale if the
+# tables are wiped underneath us; the TTL bounds that.
+_name_id_caches: dict[type, TTLCache] = {
+    Genre: TTLCache(maxsize=10_000, ttl=300),
+    Star: TTLCache(maxsize=10_000, ttl=300),
+    Director: TTLCache(maxsize=10_000, ttl=300),
+}
+
+# Association table and its foreign-key column for each named model.
+_MOVIE_LINKS = {
+    Genre: (movie_genres, "genre_id"),
+    Star: (movie_stars, "star_id"),
+    Director: (movie_directors, "director_id"),
+}
+
+
+async def _resolve_name_ids(db: AsyncSession, model, names: list[str]) -> dict[str, int]:
+    """Map ``names`` to ``model`` ids, inserting the ones that do not exist yet.
+
+    Cached names cost nothing; the rest take a single upsert. Only the cache
+    hits are trusted before commit; the caller caches the result afterwards.
+    """
+    names = list(dict.fromkeys(names))
+    cache = _name_id_caches[model]
+    ids = {name: cache[name] for name in names if name in cache}
+    # Sorted so concurrent upserts lock the same rows in the same order.
+    missing = sorted(name for name in names if name not in ids)
+    if missing:
+        # The no-op DO UPDATE makes RETURNING include rows that already
+        # existed, so new and existing names come back from one round-trip,
+        # with no window for a concurrent insert to slip in between.
+        stmt = dialect.insert(db)(model).values([{"name": name} for name in missing])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.name],
+            set_={"name": stmt.excluded.name},
+        ).returning(model.name, model.id)
+        result = await db.execute(stmt)
+        ids.update(result.tuples().all())
+    return {name: ids[name] for name in names}
 
 
 @router.post("/", response_model=schemas.MovieSchema)
@@ -160,60 +461,27 @@ async def create_movie(
     - **Returns:**
       - `MovieSchema`: The created movie object, including its relationships.
     """
-    # Conflict check
-    existing_stmt = (select(Movie)
-    .where(
-        (Movie.name == movie_data.name),
-        (Movie.year == movie_data.year)
-    ))
-    existing_result = await db.execute(existing_stmt)
-    existing_movie = existing_result.scalars().first()
-
-    if existing_movie:
-        raise HTTPException(
-            status_code=409,
-            detail=(
-                f"A movie with the name '{movie_data.name}' "
-                f"and year '{movie_data.year}' already exists."
-            )
+    conflict = HTTPException(
+        status_code=409,
+        detail=(
+            f"A movie with the name '{movie_data.name}' "
+            f"and year '{movie_data.year}' already exists."
         )
+    )
+
+    # Conflict check; EXISTS stops at the first match and returns one boolean
+    exists_stmt = select(
+        exists().where(Movie.name == movie_data.name, Movie.year == movie_data.year)
+    )
+    if await db.scalar(exists_stmt):
+        raise conflict
 
     try:
-        # Genres
-        genres = []
-        for genre_name in movie_data.genres:
-            stmt = select(Genre).where(Genre.name == genre_name)
-            result = await db.execute(stmt)
-            genre = result.scalars().first()
-            if not genre:
-                genre = Genre(name=genre_name)
-                db.add(genre)
-                await db.flush()
-            genres.append(genre)
-
-        # Stars
-        stars = []
-        for star_name in movie_data.stars:
-            stmt = select(Star).where(Star.name == star_name)
-            result = await db.execute(stmt)
-            star = result.scalars().first()
-            if not star:
-                star = Star(name=star_name)
-                db.add(star)
-                await db.flush()
-            stars.append(star)
-
-        # Directors
-        directors = []
-        for director_name in movie_data.directors:
-            stmt = select(Director).where(Director.name == director_name)
-            result = await db.execute(stmt)
-            director = result.scalars().first()
-            if not director:
-                director = Director(name=director_name)
-                db.add(director)
-                await db.flush()
-            directors.append(director)
+        name_ids = {
+            Genre: await _resolve_name_ids(db, Genre, movie_data.genres),
+            Star: await _resolve_name_ids(db, Star, movie_data.stars),
+            Director: await _resolve_name_ids(db, Director, movie_data.directors),
+        }
 
         # Create movie
         movie = Movie(
@@ -227,36 +495,47 @@ async def create_movie(
             description=movie_data.description,
             price=movie_data.price,
             certification_id=movie_data.certification_id,
-            genres=genres,
-            stars=stars,
-            directors=directors,
+            search_doc=build_search_doc(
+                movie_data.name, movie_data.description, movie_data.genres, movie_data.stars, movie_data.directors
+            ),
         )
 
         db.add(movie)
+        await db.flush()
+
+        # Link rows go straight into the association tables by id; no related
+        # objects are loaded or tracked by the session.
+        for model, (table, column) in _MOVIE_LINKS.items():
+            if name_ids[model]:
+                await db.execute(
+                    insert(table),
+                    [{"movie_id": movie.id, column: related_id} for related_id in name_ids[model].values()]
+                )
         await db.commit()
-        await db.refresh(movie)
-
-        stmt = (
-            select(Movie)
-            .options(
-                selectinload(Movie.genres),
-                selectinload(Movie.stars),
-                selectinload(Movie.directors),
-                selectinload(Movie.certification),
-            )
-            .filter_by(id=movie.id)
-        )
-        result = await db.execute(stmt)
-        movie_with_relations = result.scalar_one()
 
-        return schemas.MovieSchema.model_validate(movie_with_relations, from_attributes=True)
+        for model, ids in name_ids.items():
+            _name_id_caches[model].update(ids)
+
+        # The response reads the collections and the certification; attach
+        # them as already-loaded state. Only the certification needs a query.
+        for model, attr in ((Genre, "genres"), (Star, "stars"), (Director, "directors")):
+            set_committed_value(movie, attr, [model(id=i, name=name) for name, i in name_ids[model].items()])
+        certification = await db.get(Certification, movie_data.certification_id)
+        set_committed_value(movie, "certification", certification)
+        await _movie_list_cache.clear()
+
+        return schemas.MovieSchema.model_validate(movie, from_attributes=True)
 
     except IntegrityError:
         await db.rollback()
+        # A concurrent insert can still win the race past the EXISTS check;
+        # uix_movie_name_year rejects it, and the re-check reports the 409.
+        if await db.scalar(exists_stmt):
+            raise conflict
         raise HTTPException(status_code=400, detail="Invalid input data.")
 
 
-@router.post("/movies/{movie_id}/react/{reaction}")
+@router.post("/{movie_id}/react/{reaction}")
 async def react_to_movie(
         movie_id: int,
         reaction: ReactionType,
@@ -275,28 +554,16 @@ async def react_to_movie(
     - **Returns:**
       - `dict`: A confirmation message.
     """
-    stmt = select(MovieReaction).where(
-        MovieReaction.movie_id == movie_id,
-        MovieReaction.user_id == current_user.id
+    changed, old_reaction = await _set_reaction(
+        db, MovieReaction, MovieReaction.movie_id, movie_id, current_user.id, reaction
     )
-    result = await db.execute(stmt)
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        existing.reaction = reaction  # Update like→dislike or vice versa
-    else:
-        new_reaction = MovieReaction(
-            movie_id=movie_id,
-            user_id=current_user.id,
-            reaction=reaction
-        )
-        db.add(new_reaction)
-
     await db.commit()
+    if changed:
+        await _movie_reaction_counts.move(movie_id, _counter_name(old_reaction), _counter_name(reaction))
     return {"message": f"{reaction.value} added"}
 
 
-@router.get("/movies/{movie_id}/reactions")
+@router.get("/{movie_id}/reactions")
 async def get_movie_reactions(movie_id: int, db: AsyncSession = Depends(get_db)):
     """
     **Get the total likes and dislikes for a movie.**
@@ -309,19 +576,36 @@ async def get_movie_reactions(movie_id: int, db: AsyncSession = Depends(get_db))
     - **Returns:**
       - `dict`: An object containing the counts for likes and dislikes.
     """
-    stmt = select(MovieReaction.reaction, func.count(MovieReaction.id)).where(
-        MovieReaction.movie_id == movie_id
-    ).group_by(MovieReaction.reaction)
+    cached = (await _movie_reaction_counts.get_many([movie_id])).get(movie_id)
+    if cached is not None:
+        return cached
 
-    result = await db.execute(stmt)
-    counts = {r: c for r, c in result.all()}
-    return {
-        "likes": counts.get(ReactionType.like, 0),
-        "dislikes": counts.get(ReactionType.dislike, 0),
-    }
+    # One aggregate row with both counts; no GROUP BY to sort or regroup.
+    stmt = lambda_stmt(lambda: select(
+        func.count().filter(MovieReaction.reaction == ReactionType.like).label("likes"),
+        func.count().filter(MovieReaction.reaction == ReactionType.dislike).label("dislikes"),
+    ).where(MovieReaction.movie_id == movie_id))
+
+    row = (await db.execute(stmt)).one()
+    totals = {"likes": row.likes, "dislikes": row.dislikes}
+    await _movie_reaction_counts.backfill({movie_id: totals})
+    return totals
 
 
-@router.post("/movies/{movie_id}/comments", response_model=CommentSchema)
+def _comment_item(comment: Comment, counts: dict[str, int]) -> CommentSchema:
+    """``CommentSchema`` from the loaded columns of ``comment`` and its reaction totals."""
+    return CommentSchema(
+        id=comment.id,
+        content=comment.content,
+        created_at=comment.created_at,
+        updated_at=comment.updated_at,
+        user_id=comment.user_id,
+        likes=counts["likes"],
+        dislikes=counts["dislikes"],
+    )
+
+
+@router.post("/{movie_id}/comments", response_model=CommentSchema)
 async def add_comment(
         movie_id: int,
         comment: CommentCreate,
@@ -343,16 +627,13 @@ async def add_comment(
     new_comment = Comment(
         user_id=current_user.id,
         movie_id=movie_id,
-        content=comment.content
+        content=comment.content,
+        # Set explicitly so the INSERT does not go back to fetch it.
+        updated_at=None
     )
     db.add(new_comment)
     await db.commit()
-    await db.refresh(new_comment)
-    return CommentSchema(
-        **new_comment.__dict__,
-        likes=0,
-        dislikes=0
-    )
+    return _schema_response(_comment_item(new_comment, {"likes": 0, "dislikes": 0}))
 
 
 @router.delete("/comments/{comment_id}")
@@ -376,14 +657,16 @@ async def delete_comment(
     - **Returns:**
       - `dict`: A confirmation message.
     """
-    result = await db.execute(select(Comment).where(Comment.id == comment_id))
-    comment = result.scalar_one_or_none()
-    if not comment:
+    # Only the owner is needed; loading the Comment would make the ORM load
+    # its reactions one by one to cascade the delete.
+    owner_id = await db.scalar(select(Comment.user_id).where(Comment.id == comment_id))
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="Comment not found")
-    if comment.user_id != current_user.id:
+    if owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not allowed to delete this comment")
 
-    await db.delete(comment)
+    await db.execute(delete(CommentReaction).where(CommentReaction.comment_id == comment_id))
+    await db.execute(delete(Comment).where(Comment.id == comment_id))
     await db.commit()
     return {"message": "Comment deleted"}
 
@@ -407,33 +690,22 @@ async def react_to_comment(
     - **Returns:**
       - `dict`: A confirmation message.
     """
-    stmt = select(CommentReaction).where(
-        CommentReaction.comment_id == comment_id,
-        CommentReaction.user_id == current_user.id
+    changed, old_reaction = await _set_reaction(
+        db, CommentReaction, CommentReaction.comment_id, comment_id, current_user.id, reaction
     )
-    result = await db.execute(stmt)
-    existing = result.scalar_one_or_none()
-
-    if existing:
-        existing.reaction = reaction
-    else:
-        new_reaction = CommentReaction(
-            comment_id=comment_id,
-            user_id=current_user.id,
-            reaction=reaction
-        )
-        db.add(new_reaction)
-
     await db.commit()
+    if changed:
+        await _comment_reaction_counts.move(comment_id, _counter_name(old_reaction), _counter_name(reaction))
     return {"message": f"{reaction.value} added"}
 
 
-@router.get("/movies/{movie_id}/comments", response_model=CommentResponse)
+@router.get("/{movie_id}/comments", response_model=CommentResponse)
 async def list_comments(
         movie_id: int,
         db: AsyncSession = Depends(get_db),
         page: int = Query(1, ge=1),
         size: int = Query(10, ge=1, le=100),
+        after: int | None = Query(None, description="Cursor from a previous page's `next_page`."),
 ):
     """
     **List all comments for a movie.**
@@ -444,60 +716,74 @@ async def list_comments(
       - `movie_id`: The ID of the movie.
       - `page`: The page number to retrieve.
       - `size`: The number of comments per page.
+      - `after`: Seek past the previous page instead of counting `page`; totals are omitted.
 
     - **Returns:**
       - `CommentResponse`: A paginated list of comments with reaction counts.
     """
-    total_stmt = select(func.count(Comment.id)).where(Comment.movie_id == movie_id)
-    total_result = await db.execute(total_stmt)
-    total = total_result.scalar_one()
-
-    stmt = (
-        select(Comment)
-        .where(Comment.movie_id == movie_id)
-        .offset((page - 1) * size)
-        .limit(size)
-    )
+    # One extra row tells whether there is a next page.
+    skip, fetch = (page - 1) * size, size + 1
+    if after is None:
+        # The window count is evaluated before OFFSET/LIMIT, so the page and
+        # the total come back from one statement.
+        stmt = lambda_stmt(
+            lambda: select(Comment, func.count().over().label("total"))
+            .options(raiseload("*"))
+            .where(Comment.movie_id == movie_id)
+            .order_by(Comment.id)
+            .offset(skip)
+            .limit(fetch)
+        )
+    else:
+        # Seek on (movie_id, id) instead of reading and discarding the rows
+        # of every earlier page.
+        stmt = lambda_stmt(
+            lambda: select(Comment)
+            .options(raiseload("*"))
+            .where(Comment.movie_id == movie_id, Comment.id > after)
+            .order_by(Comment.id)
+            .limit(fetch)
+        )
     result = await db.execute(stmt)
-    comments = result.scalars().all()
+    rows = result.all()
 
-    if not comments:
-        return CommentResponse(items=[], total=total, page=page, size=size)
+    if not rows:
+        return _schema_response(CommentResponse(items=[]))
 
+    has_next = len(rows) > size
+    rows = rows[:size]
+    comments = [row.Comment for row in rows]
+    total = rows[0].total if after is None else None
     comment_ids = [c.id for c in comments]
 
-    reaction_stmt = (
-        select(
-            CommentReaction.comment_id,
-            CommentReaction.reaction,
-            func.count(CommentReaction.id).label("count"),
-        )
-        .where(CommentReaction.comment_id.in_(comment_ids))
-        .group_by(CommentReaction.comment_id, CommentReaction.reaction)
-    )
-    reaction_result = await db.execute(reaction_stmt)
-
-    reaction_map: dict[int, dict[str, int]] = {}
-    for comment_id, reaction, count in reaction_result.all():
-        if comment_id not in reaction_map:
-            reaction_map[comment_id] = {"like": 0, "dislike": 0}
-        reaction_map[comment_id][reaction.value] = count
-
-    items = [
-        CommentSchema(
-            **c.__dict__,
-            likes=reaction_map.get(c.id, {}).get("like", 0),
-            dislikes=reaction_map.get(c.id, {}).get("dislike", 0),
+    reaction_map = await _comment_reaction_counts.get_many(comment_ids)
+    missing = [comment_id for comment_id in comment_ids if comment_id not in reaction_map]
+    if missing:
+        # Only comments without cached totals are aggregated, and written
+        # back so the next page view finds them.
+        fresh = {comment_id: {"likes": 0, "dislikes": 0} for comment_id in missing}
+        reaction_stmt = (
+            select(
+                CommentReaction.comment_id,
+                func.count().filter(CommentReaction.reaction == ReactionType.like).label("likes"),
+                func.count().filter(CommentReaction.reaction == ReactionType.dislike).label("dislikes"),
+            )
+            .where(CommentReaction.comment_id.in_(missing))
+            .group_by(CommentReaction.comment_id)
         )
-        for c in comments
-    ]
+        for comment_id, likes, dislikes in (await db.execute(reaction_stmt)).all():
+            fresh[comment_id] = {"likes": likes, "dislikes": dislikes}
+        await _comment_reaction_counts.backfill(fresh)
+        reaction_map.update(fresh)
 
-    total_pages = (total + size - 1) // size
+    items = [_comment_item(c, reaction_map[c.id]) for c in comments]
 
-    return CommentResponse(
+    total_pages = (total + size - 1) // size if total is not None else None
+
+    return _schema_response(CommentResponse(
         items=items,
-        total_items=str(total),
-        total_pages=str(total_pages),
-        prev_page=f"/movies/{movie_id}/comments/?page={page - 1}&limit={size}" if page > 1 else None,
-        next_page=f"/movies/{movie_id}/comments/?page={page + 1}&limit={size}" if page < total else None,
-    )
+        total_items=str(total) if total is not None else None,
+        total_pages=str(total_pages) if total_pages is not None else None,
+        prev_page=f"/movies/{movie_id}/comments?page={page - 1}&size={size}" if after is None and page > 1 else None,
+        next_page=f"/movies/{movie_id}/comments?size={size}&after={comments[-1].id}" if has_next else None,
+    ))
@@ -1,20 +1,62 @@
 from datetime import datetime
 from decimal import Decimal
 from typing import List, Optional
+from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select, asc, desc
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select, insert, delete, exists, func, lambda_stmt, asc, desc, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import raiseload, aliased
 
 from src.database.models.cart import Cart, CartItem, Purchase
+from src.database.models.movies import Movie
 from src.database.models.orders import OrderItem, Order, OrderStatusesEnum
 from src.database.session import get_db
 from src.deps import get_current_user, get_current_admin
 from src.schemas.orders import OrderSchema
+from src.utils.response_cache import ResponseCache
 
 router = APIRouter(tags=["orders"])
 
+# Admin listing lookups, built once instead of per request.
+_ORDER_STATUSES = {member.value.lower(): member for member in OrderStatusesEnum}
+_ORDER_SORT_COLUMNS = {
+    "created_at": Order.created_at,
+    "total_amount": Order.total_amount,
+    "user_id": Order.user_id,
+    "status": Order.status,
+}
+_SORT_DIRECTIONS = {"asc": asc, "desc": desc}
+
+_ORDER_LIST_ADAPTER = TypeAdapter(list[OrderSchema])
+
+# Admin listing pages, dropped whenever an order is created or changes
+# status. With Redis the drop reaches every worker; otherwise other workers'
+# local copies may trail by up to the TTL.
+_admin_orders_cache = ResponseCache("orders:admin", maxsize=1_000, ttl=30)
+
+
+def _orders_body(orders: list[Order]) -> bytes:
+    """Serialize orders in one pydantic-core pass, skipping FastAPI's
+    per-item ``response_model`` validation.
+
+    ``response_model`` stays on the routes for the OpenAPI docs only.
+    """
+    return _ORDER_LIST_ADAPTER.dump_json(_ORDER_LIST_ADAPTER.validate_python(orders, from_attributes=True))
+
+
+def _page_response(headers: dict[str, str], body: bytes) -> Response:
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _cached_page(cached: bytes) -> Response:
+    # Cached as {"headers": {...}, "body": "<serialized orders>"}; the body
+    # stays an opaque string, so the order list itself is not re-parsed.
+    page = orjson.loads(cached)
+    return _page_response(page["headers"], page["body"].encode())
+
 
 @router.post("/orders/", response_model=OrderSchema)
 async def create_order(
@@ -33,64 +75,68 @@ async def create_order(
     - **Returns:**
       - `OrderSchema`: The newly created order object.
     """
-    cart_stmt = (
-        select(Cart)
-        .where(Cart.user_id == user.id)
-        .options(selectinload(Cart.items).selectinload(CartItem.movie))
+    # Cart id, movie ids, current prices and the purchase/pending-order
+    # conflicts for each item come back in one joined SELECT. lambda_stmt
+    # caches the built statement; ``user_id`` becomes a bound parameter.
+    user_id = user.id
+    cart_stmt = lambda_stmt(lambda: select(
+        CartItem.cart_id,
+        CartItem.movie_id,
+        Movie.price,
+        exists().where(
+            Purchase.user_id == user_id,
+            Purchase.movie_id == CartItem.movie_id
+        ).label("purchased"),
+        exists().where(
+            OrderItem.order_id == Order.id,
+            Order.user_id == user_id,
+            Order.status == OrderStatusesEnum.Pending,
+            OrderItem.movie_id == CartItem.movie_id
+        ).label("pending"),
     )
-    result = await db.execute(cart_stmt)
-    cart = result.scalars().first()
+        .join(Cart, Cart.id == CartItem.cart_id)
+        .join(Movie, Movie.id == CartItem.movie_id)
+        .where(Cart.user_id == user_id)
+        .order_by(CartItem.id))
+    cart_items = (await db.execute(cart_stmt)).all()
 
-    if not cart or not cart.items:
+    if not cart_items:
         raise HTTPException(status_code=404, detail="Cart not found or is empty")
+    cart_id = cart_items[0].cart_id
 
     order_items_to_create = []
     to_pay = Decimal('0.00')
 
-    for item in cart.items:
-        purchase_stmt = select(Purchase).where(
-            Purchase.movie_id == item.movie_id,
-            Purchase.user_id == user.id
-        )
-        result = await db.execute(purchase_stmt)
-        if result.scalars().first():
+    for item in cart_items:
+        if item.purchased:
             raise HTTPException(status_code=409, detail=f"Movie with ID {item.movie_id} is already purchased.")
-
-        pending_order_stmt = select(OrderItem).join(Order).where(
-            OrderItem.movie_id == item.movie_id,
-            Order.user_id == user.id,
-            Order.status == OrderStatusesEnum.Pending
-        )
-        result = await db.execute(pending_order_stmt)
-        if result.scalars().first():
+        if item.pending:
             raise HTTPException(status_code=409,
                                 detail=f"A pending order for movie with ID {item.movie_id} already exists.")
 
         order_items_to_create.append({
-            "movie_id": item.movie.id,
-            "price_at_order": item.movie.price
+            "movie_id": item.movie_id,
+            "price_at_order": item.price
         })
-        to_pay += item.movie.price
+        to_pay += item.price
 
-    new_order = Order(
-        user_id=user.id,
-        status=OrderStatusesEnum.Pending,
-        total_amount=to_pay
+    # RETURNING hands back the full row, so no flush or refresh is needed.
+    new_order = await db.scalar(
+        insert(Order)
+        .values(user_id=user_id, status=OrderStatusesEnum.Pending, total_amount=to_pay)
+        .returning(Order)
     )
-    db.add(new_order)
-    await db.flush()
 
+    # One executemany INSERT for all items instead of a unit-of-work add each.
     for item_data in order_items_to_create:
-        new_order_item = OrderItem(
-            order_id=new_order.id,
-            movie_id=item_data["movie_id"],
-            price_at_order=item_data["price_at_order"]
-        )
-        db.add(new_order_item)
+        item_data["order_id"] = new_order.id
+    await db.execute(insert(OrderItem), order_items_to_create)
 
-    await db.delete(cart)
+    # Empty the cart but keep its row, as paying does: one DELETE, and the
+    # next cart view or add does not have to create the cart again.
+    await db.execute(delete(CartItem).where(CartItem.cart_id == cart_id))
     await db.commit()
-    await db.refresh(new_order)
+    await _admin_orders_cache.clear()
 
     return new_order
 
@@ -116,8 +162,10 @@ async def cancel_order(
     - **Returns:**
       - `OrderSchema`: The updated order object with a 'Canceled' status.
     """
-    stmt = select(Order).where(Order.id == order_id, Order.user_id == user.id)
-    result = await db.execute(stmt)
+    user_id = user.id
+    result = await db.execute(lambda_stmt(
+        lambda: select(Order).where(Order.id == order_id, Order.user_id == user_id)
+    ))
     order = result.scalars().first()
 
     if not order:
@@ -126,9 +174,11 @@ async def cancel_order(
     if order.status != OrderStatusesEnum.Pending:
         raise HTTPException(status_code=409, detail=f"Order status is '{order.status.value}', cannot be canceled.")
 
+    # Sessions keep attributes after commit and orders have no server-side
+    # onupdate columns, so the object is already current; no refresh SELECT.
     order.status = OrderStatusesEnum.Canceled
     await db.commit()
-    await db.refresh(order)
+    await _admin_orders_cache.clear()
 
     return order
 
@@ -147,24 +197,30 @@ async def get_orders(db: AsyncSession = Depends(get_db),
     - **Returns:**
       - `list[OrderSchema]`: A list of the user's orders.
     """
-    stmt = select(Order).options(selectinload(Order.items)).where(Order.user_id == user.id)
-    result = await db.execute(stmt)
+    # OrderSchema carries no items, so they are never loaded at all.
+    user_id = user.id
+    result = await db.execute(lambda_stmt(
+        lambda: select(Order).options(raiseload(Order.items)).where(Order.user_id == user_id)
+    ))
     orders = result.scalars().all()
     if not orders:
         raise HTTPException(status_code=404, detail="No orders found")
 
-    return orders
+    return Response(content=_orders_body(orders), media_type="application/json")
 
 
 @router.get("/admin/orders", response_model=list[OrderSchema])
 async def get_all_orders(
+        request: Request,
         db: AsyncSession = Depends(get_db),
         user_id: Optional[int] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
         status: Optional[str] = None,
-        page: int = 1,
-        limit: int = 10,
+        page: int = Query(1, ge=1, le=10_000, description="Deeper pages are reached with `after`."),
+        limit: int = Query(10, ge=1, le=100),
+        after: Optional[int] = Query(None, description="Id of the last order on the previous page."),
+        exact_count: bool = Query(False, description="Count every matching order into `X-Total-Count`."),
         sort_by: str = "created_at",
         sort_order: str = "desc",
         admin_user=Depends(get_current_admin)
@@ -174,6 +230,9 @@ async def get_all_orders(
 
     This endpoint is for administrators only. It allows for advanced queries to retrieve orders based on various criteria, including user ID, date range, status, and sorting options.
 
+    - **Pagination:** `page` for numbered pages, or `after` to seek past the previous page. When more orders follow, the URL of the next page is sent in a `Link: <...>; rel="next"` header.
+    - **Totals:** with `exact_count=true` on numbered pages, the number of matching orders is sent in an `X-Total-Count` header.
+
     - **Raises:**
       - `HTTPException` 400: If invalid query parameters are provided for status, sort_by, or sort_order.
       - `HTTPException` 404: If no orders are found matching the criteria.
@@ -181,7 +240,20 @@ async def get_all_orders(
     - **Returns:**
       - `list[OrderSchema]`: A list of orders matching the specified criteria.
     """
-    stmt = select(Order).options(selectinload(Order.items))
+    cache_key = urlencode(sorted(request.query_params.multi_items()))
+    cached = await _admin_orders_cache.get(cache_key)
+    if cached is not None:
+        return _cached_page(cached)
+
+    # The total rides along on every row as a window count rather than costing
+    # a second COUNT query; it is opt-in since it reads every matching row.
+    count_rows = exact_count and after is None
+    if count_rows:
+        stmt = select(Order, func.count().over().label("total"))
+    else:
+        stmt = select(Order)
+    # OrderSchema carries no items, so they are never loaded at all.
+    stmt = stmt.options(raiseload(Order.items))
 
     if user_id is not None:
         stmt = stmt.where(Order.user_id == user_id)
@@ -194,37 +266,45 @@ async def get_all_orders(
         stmt = stmt.where(Order.created_at <= end_date)
 
     if status is not None:
-        try:
-            order_status_enum = OrderStatusesEnum(status.capitalize())
-            stmt = stmt.where(Order.status == order_status_enum)
-        except ValueError:
+        order_status_enum = _ORDER_STATUSES.get(status.lower())
+        if order_status_enum is None:
             raise HTTPException(status_code=400, detail=f"Invalid status: '{status}'")
+        stmt = stmt.where(Order.status == order_status_enum)
 
-    sortable_columns = {
-        "created_at": Order.created_at,
-        "total_amount": Order.total_amount,
-        "user_id": Order.user_id,
-        "status": Order.status,
-    }
-
-    if sort_by not in sortable_columns:
+    order_column = _ORDER_SORT_COLUMNS.get(sort_by)
+    if order_column is None:
         raise HTTPException(status_code=400,
-                            detail=f"Invalid sort_by parameter. Must be one of {list(sortable_columns.keys())}")
-
-    order_column = sortable_columns[sort_by]
+                            detail=f"Invalid sort_by parameter. Must be one of {list(_ORDER_SORT_COLUMNS)}")
 
-    if sort_order.lower() == "asc":
-        stmt = stmt.order_by(asc(order_column))
-    elif sort_order.lower() == "desc":
-        stmt = stmt.order_by(desc(order_column))
-    else:
+    direction = _SORT_DIRECTIONS.get(sort_order.lower())
+    if direction is None:
         raise HTTPException(status_code=400, detail="Invalid sort_order parameter. Must be 'asc' or 'desc'.")
 
-    offset = (page - 1) * limit
-    stmt = stmt.offset(offset).limit(limit)
+    # Order.id breaks ties so rows sharing a sort value keep a stable page order.
+    stmt = stmt.order_by(direction(order_column), direction(Order.id))
+
+    if after is not None:
+        # The cursor row's sort value is read back from the table rather than
+        # carried in the URL, so it compares exactly as stored.
+        cursor_order = aliased(Order)
+        cursor_value = (
+            select(getattr(cursor_order, sort_by))
+            .where(cursor_order.id == after)
+            .scalar_subquery()
+        )
+        seek_key = tuple_(order_column, Order.id)
+        cursor_key = tuple_(cursor_value, after)
+        stmt = stmt.where(seek_key > cursor_key if direction is asc else seek_key < cursor_key)
+
+    # A keyset seek walks the (sort column, id) index from the cursor, so deep
+    # pages cost the same as the first; OFFSET stays for numbered pages.
+    if after is None:
+        stmt = stmt.offset((page - 1) * limit)
+    stmt = stmt.limit(limit + 1)
 
     result = await db.execute(stmt)
-    orders = result.scalars().unique().all()
+    rows = result.all()
+    orders = [row[0] for row in rows]
 
     if not orders:
         raise HTTPException(
@@ -232,4 +312,18 @@ async def get_all_orders(
             detail="No orders found matching the criteria."
         )
 
-    return orders
+    has_next = len(orders) > limit
+    orders = orders[:limit]
+    headers = {}
+
+    if count_rows:
+        headers["X-Total-Count"] = str(rows[0].total)
+
+    if has_next:
+        params = {k: v for k, v in request.query_params.items() if k not in ("page", "after")}
+        params["after"] = orders[-1].id
+        headers["Link"] = f'</admin/orders?{urlencode(params)}>; rel="next"'
+
+    body = _orders_body(orders)
+    await _admin_orders_cache.set(cache_key, orjson.dumps({"headers": headers, "body": body.decode()}))
+    return _page_response(headers, body)
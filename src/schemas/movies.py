@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from uuid import UUID
+
+from pydantic import BaseModel, Field, field_validator
 
 
 class GenreSchema(BaseModel):
@@ -54,10 +56,35 @@ class MovieSchema(MovieBase):
     stars: List[StarSchema] = Field(..., description="A list of the main stars in the movie.")
     directors: List[DirectorSchema] = Field(..., description="A list of directors of the movie.")
 
+    @field_validator("uuid", mode="before")
+    @classmethod
+    def format_uuid(cls, value):
+        # Stored as 16 raw bytes; exposed in the canonical hyphenated form.
+        if isinstance(value, bytes):
+            return str(UUID(bytes=value))
+        return value
+
     class Config:
         from_attributes = True
 
 
+class MovieListItemSchema(BaseModel):
+    """
+    Schema for a movie in a list; stars, directors and the description are only in the detail view.
+    """
+    id: int = Field(..., description="The unique ID of the movie.")
+    uuid: str = Field(..., description="The unique identifier for the movie.")
+    name: str = Field(..., description="The title of the movie.")
+    year: int = Field(..., description="The release year of the movie.")
+    time: int = Field(..., description="The runtime of the movie in minutes.")
+    imdb: float = Field(..., description="The IMDb rating of the movie.")
+    votes: int = Field(..., description="The number of votes the movie has received on IMDb.")
+    price: float = Field(..., description="The price of the movie.")
+    certification_id: int = Field(..., description="The ID of the movie's certification.")
+    certification: Optional[CertificationSchema] = Field(None, description="The movie's certification details.")
+    genres: List[GenreSchema] = Field(..., description="A list of genres associated with the movie.")
+
+
 class MovieCreateSchema(BaseModel):
     """
     Schema for creating a new movie.
@@ -86,7 +113,7 @@ class MovieListSchema(BaseModel):
     """
     Schema for a paginated list of movies.
     """
-    movies: List[MovieSchema]
+    movies: List[MovieListItemSchema]
     prev_page: Optional[str] = Field(None, description="URL for the previous page of results.")
     next_page: Optional[str] = Field(None, description="URL for the next page of results.")
     total_pages: Optional[str] = Field(None, description="Total number of pages available.")
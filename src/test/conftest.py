@@ -1,8 +1,20 @@
+import os
+
+# Calibrating Argon2 takes seconds at every app startup.
+os.environ.setdefault("PASSWORD_HASH_AUTOTUNE", "false")
+# Registration and login tests hash for real; 1 MiB Argon2id keeps that cheap.
+os.environ.setdefault("PASSWORD_HASH_MEMORY_MIB", "1")
+# A named in-memory database shared by every pooled connection, the app's
+# own engine (used by background notifications) included: no file to open,
+# fsync or clean up, and the pools keep it and its page cache alive.
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///file:test?mode=memory&cache=shared&uri=true"
+
 import pytest
 import pytest_asyncio
-from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.database.models.base import Base
 from src.database.models.user import User
@@ -11,10 +23,11 @@ from src.database.models.cart import Cart
 from src.database.models.movies import Movie
 from src.database.session import get_db
 from src.main import app
+from src.utils.hash import hash_password
 
-DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+DATABASE_URL = os.environ["DATABASE_URL"]
 
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+engine = create_async_engine(DATABASE_URL, echo=False, future=True, poolclass=AsyncAdaptedQueuePool, pool_size=5)
 TestingSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,
@@ -42,10 +55,30 @@ async def prepare_test_db():
     await engine.dispose()
 
 
-@pytest.fixture()
-def client():
-    with TestClient(app) as c:
-        yield c
+@pytest.fixture(autouse=True)
+def restore_dependency_overrides():
+    # Tests swap in their own user/admin; only the get_db override above is
+    # meant to outlive a test.
+    saved = dict(app.dependency_overrides)
+    yield
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(saved)
+
+
+@pytest.fixture(scope="session")
+def password_hash():
+    # Route tests override the auth dependencies and never verify passwords,
+    # so one hash serves every user they create.
+    return hash_password("pass")
+
+
+@pytest_asyncio.fixture()
+async def client():
+    # Requests run on the test's own event loop; no portal thread per call.
+    # The lifespan only autotunes hashing and pre-warms the app pool, neither
+    # of which the tests need.
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
 
 
 @pytest_asyncio.fixture()
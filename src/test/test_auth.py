@@ -1,11 +1,19 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
+from argon2 import PasswordHasher
+from fastapi import HTTPException
 from sqlalchemy import select
 
-from src.database.models.user import User
+from src.crud import auth as crud_auth
+from src.database.models.user import RefreshToken, User, UserGroupEnum
+from src.deps import CurrentUser, get_current_admin
+from src.utils.hash import _argon2id, legacy_pwd_context, password_needs_rehash
 
 
-def test_register_user(client):
-    response = client.post("/api/v1/auth/register", json={
+@pytest.mark.asyncio
+async def test_register_user(client):
+    response = await client.post("/api/v1/auth/register", json={
         "email": "test@example.com",
         "password": "strongpassword123"
     })
@@ -15,13 +23,33 @@ def test_register_user(client):
     assert data["email"] == "test@example.com"
 
 
-def test_login_user_not_activated(client):
-    client.post("/api/v1/auth/register", json={
+@pytest.mark.asyncio
+async def test_register_duplicate_email(client, monkeypatch):
+    await client.post("/api/v1/auth/register", json={
+        "email": "duplicate@example.com",
+        "password": "strongpassword123"
+    })
+
+    async def no_hash(password):
+        raise AssertionError("a taken address must not be hashed")
+
+    monkeypatch.setattr(crud_auth, "hash_password_async", no_hash)
+    response = await client.post("/api/v1/auth/register", json={
+        "email": "duplicate@example.com",
+        "password": "strongpassword123"
+    })
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Email already registered"
+
+
+@pytest.mark.asyncio
+async def test_login_user_not_activated(client):
+    await client.post("/api/v1/auth/register", json={
         "email": "login@test.com",
         "password": "mypassword123"
     })
 
-    response = client.post("/api/v1/auth/login", json={
+    response = await client.post("/api/v1/auth/login", json={
         "email": "login@test.com",
         "password": "mypassword123"
     })
@@ -33,7 +61,7 @@ def test_login_user_not_activated(client):
 
 @pytest.mark.asyncio
 async def test_login_user_activated_then_logout(client, db_session):
-    client.post("/api/v1/auth/register", json={
+    await client.post("/api/v1/auth/register", json={
         "email": "login@test.com",
         "password": "mypassword123"
     })
@@ -44,7 +72,7 @@ async def test_login_user_activated_then_logout(client, db_session):
     db_session.add(user)
     await db_session.commit()
 
-    response = client.post("/api/v1/auth/login", json={
+    response = await client.post("/api/v1/auth/login", json={
         "email": "login@test.com",
         "password": "mypassword123"
     })
@@ -55,7 +83,61 @@ async def test_login_user_activated_then_logout(client, db_session):
     assert "refresh_token" in data
     access_token = data["refresh_token"]
 
-    response = client.post(
+    response = await client.post(
         "/api/v1/auth/logout", json={"refresh_token": access_token})
     assert response.status_code == 200
     assert response.json()["detail"] == "Logged out"
+
+
+def test_password_needs_rehash_compares_against_configured_floor():
+    # Conftest sets the floor to 1 MiB; stronger hashes, e.g. from an
+    # autotuned worker, must not be rehashed back down.
+    assert not password_needs_rehash(_argon2id(2).hash("pass"))
+    assert password_needs_rehash(PasswordHasher(memory_cost=512, parallelism=1).hash("pass"))
+    assert password_needs_rehash(legacy_pwd_context.hash("pass", rounds=4))
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_legacy_bcrypt_password(client, db_session):
+    user = User(email="legacy@test.com", hashed_password=legacy_pwd_context.hash("mypassword123", rounds=4),
+                is_active=True, group_id=1)
+    db_session.add(user)
+    await db_session.commit()
+
+    response = await client.post("/api/v1/auth/login", json={
+        "email": "legacy@test.com",
+        "password": "mypassword123"
+    })
+    assert response.status_code == 200
+
+    await db_session.refresh(user)
+    assert user.hashed_password.startswith("$argon2id$")
+
+
+@pytest.mark.asyncio
+async def test_refresh_rejects_expired_token(client, db_session):
+    user = User(email="refresh@test.com", hashed_password="x", is_active=True, group_id=1)
+    db_session.add(user)
+    await db_session.flush()
+    db_session.add(RefreshToken(user_id=user.id, token="expired-refresh",
+                                expires_at=datetime.now(timezone.utc) - timedelta(minutes=1)))
+    await db_session.commit()
+
+    response = await client.post("/api/v1/auth/refresh", json={"refresh_token": "expired-refresh"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Refresh token expired"
+
+
+@pytest.mark.parametrize("group, allowed", [
+    (UserGroupEnum.USER, False),
+    (UserGroupEnum.MODERATOR, True),
+    (UserGroupEnum.ADMIN, True),
+])
+def test_get_current_admin_rejects_only_plain_users(group, allowed):
+    user = CurrentUser(id=1, email="group@test.com", is_active=True, group_id=1, group_name=group.value)
+    if allowed:
+        assert get_current_admin(user) is user
+    else:
+        with pytest.raises(HTTPException) as exc_info:
+            get_current_admin(user)
+        assert exc_info.value.status_code == 403
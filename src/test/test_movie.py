@@ -1,47 +1,77 @@
+import base64
+
+import orjson
 import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
 
-from src.database.models.movies import ReactionType
+from src.crud.movies import backfill_search_docs
+from src.database.models.movies import Movie, MovieReaction, ReactionType
 from src.database.models.user import User
-from src.schemas.movies import MovieCreateSchema
-from src.utils.hash import hash_password
+from src.main import app
+from src.routes.movies import _set_reaction, create_movie, get_current_user, movie_detail_options
+from src.schemas.movies import MovieCreateSchema, MovieSchema
+
+
+# Validated once; each test movie is a copy with its own name.
+_MOVIE_PROTO = MovieCreateSchema(
+    name="Test Movie",
+    year=2020,
+    time=120,
+    imdb=8.5,
+    votes=1000,
+    meta_score=75,
+    gross=1000000,
+    description="A test movie",
+    price=9.99,
+    certification_id=1,
+    genres=["Action"],
+    stars=["Actor 1"],
+    directors=["Director 1"]
+)
 
 
 async def create_test_movie(db_session, name="Test Movie"):
-    movie_data = MovieCreateSchema(
-        name=name,
-        year=2020,
-        time=120,
-        imdb=8.5,
-        votes=1000,
-        meta_score=75,
-        gross=1000000,
-        description="A test movie",
-        price=9.99,
-        certification_id=1,
-        genres=["Action"],
-        stars=["Actor 1"],
-        directors=["Director 1"]
-    )
-    from src.routes.movies import create_movie
-    return await create_movie(movie_data, db_session)
+    return await create_movie(_MOVIE_PROTO.model_copy(update={"name": name}), db_session)
 
 
 @pytest.mark.asyncio
 async def test_list_movies(client, db_session, prepare_test_db):
     await create_test_movie(db_session, "List Movie")
 
-    response = client.get("/movies/?page=1&limit=10")
+    response = await client.get("/movies/?page=1&limit=10")
     assert response.status_code == 200
     data = response.json()
     assert "movies" in data
     assert len(data["movies"]) >= 1
 
+    # List items carry the light projection; the detail view has the rest.
+    item = next(movie for movie in data["movies"] if movie["name"] == "List Movie")
+    assert item["genres"][0]["name"] == "Action"
+    assert "description" not in item
+    assert "stars" not in item
+
+
+@pytest.mark.asyncio
+async def test_list_movies_total_respects_filters(client, db_session):
+    await create_test_movie(db_session, "Filtered Total Movie")
+
+    response = await client.get("/movies/?q=Filtered Total&exact_count=true")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_items"] == "1"
+    assert data["total_pages"] == "1"
+
+    response = await client.get("/movies/?q=Filtered Total")
+    assert response.status_code == 200
+    assert response.json()["total_items"] is None
+
 
 @pytest.mark.asyncio
 async def test_get_movie(client, db_session):
     movie = await create_test_movie(db_session, "Single Movie")
 
-    response = client.get(f"/movies/{movie.id}")
+    response = await client.get(f"/movies/{movie.id}")
     assert response.status_code == 200
     data = response.json()
     assert data["name"] == "Single Movie"
@@ -65,98 +95,180 @@ async def test_create_movie_conflict(client, db_session):
         "stars": ["Actor 1"],
         "directors": ["Director 1"]
     }
-    response = client.post("/movies/", json=payload)
+    response = await client.post("/movies/", json=payload)
     assert response.status_code == 409
     assert "already exists" in response.json()["detail"]
 
 
-@pytest.mark.asyncio
-async def test_react_to_movie(client, db_session):
-    user = User(email="react@test.com", hashed_password=hash_password("StrongPa$$worD"), is_active=True, group_id=1)
+@pytest_asyncio.fixture()
+async def user_and_movie(db_session, password_hash, request):
+    """A fresh user, signed in for the movie routes, and a movie named after the test."""
+    user = User(email=f"{request.node.name}@test.com", hashed_password=password_hash, is_active=True, group_id=1)
     db_session.add(user)
     await db_session.commit()
-    await db_session.refresh(user)
-
-    movie = await create_test_movie(db_session, "React Movie")
-
-    from src.main import app
-    from src.routes.movies import get_current_user
+    movie = await create_test_movie(db_session, request.node.name)
     app.dependency_overrides[get_current_user] = lambda: user
+    return user, movie
 
-    response = client.post(f"/movies/movies/{movie.id}/react/{ReactionType.like.value}")
-    assert response.status_code == 200
-    assert "like added" in response.json()["message"]
 
-    response = client.get(f"/movies/movies/{movie.id}/reactions")
+@pytest.mark.asyncio
+@pytest.mark.parametrize("reactions, likes, dislikes", [
+    ([ReactionType.like], 1, 0),
+    ([ReactionType.like, ReactionType.dislike], 0, 1),
+    ([ReactionType.like, ReactionType.like, ReactionType.like], 1, 0),
+])
+async def test_react_to_movie(client, user_and_movie, reactions, likes, dislikes):
+    _, movie = user_and_movie
+
+    for reaction in reactions:
+        response = await client.post(f"/movies/{movie.id}/react/{reaction.value}")
+        assert response.status_code == 200
+        assert f"{reaction.value} added" in response.json()["message"]
+
+    response = await client.get(f"/movies/{movie.id}/reactions")
     assert response.status_code == 200
-    data = response.json()
-    assert data["likes"] == 1
+    assert response.json() == {"likes": likes, "dislikes": dislikes}
 
-    response = client.post(f"/movies/movies/{movie.id}/react/{ReactionType.dislike.value}")
-    assert response.status_code == 200
-    assert "dislike added" in response.json()["message"]
 
-    response = client.get(f"/movies/movies/{movie.id}/reactions")
-    assert response.status_code == 200
-    data = response.json()
-    assert data["dislikes"] == 1
+@pytest.mark.asyncio
+async def test_set_reaction_reports_the_replaced_reaction(db_session, user_and_movie):
+    user, movie = user_and_movie
 
+    async def react(reaction):
+        return await _set_reaction(db_session, MovieReaction, MovieReaction.movie_id, movie.id, user.id, reaction)
 
-@pytest.mark.asyncio
-async def test_react_to_movie_multiple_times(client, db_session):
-    user = User(email="react1@test.com", hashed_password=hash_password("StrongPa$$worD"), is_active=True, group_id=1)
-    db_session.add(user)
+    # These transitions drive the shared counters' deltas.
+    assert await react(ReactionType.like) == (True, None)
+    assert await react(ReactionType.like) == (False, ReactionType.like)
+    assert await react(ReactionType.dislike) == (True, ReactionType.like)
+    assert await react(ReactionType.like) == (True, ReactionType.dislike)
     await db_session.commit()
-    await db_session.refresh(user)
 
-    movie = await create_test_movie(db_session, "React Movie2")
 
-    from src.main import app
-    from src.routes.movies import get_current_user
-    app.dependency_overrides[get_current_user] = lambda: user
+@pytest.mark.asyncio
+async def test_add_and_list_comments_comment_reaction(client, user_and_movie):
+    _, movie = user_and_movie
 
-    response = client.post(f"/movies/movies/{movie.id}/react/{ReactionType.like.value}")
+    payload = {"content": "Great movie!"}
+    response = await client.post(f"/movies/{movie.id}/comments", json=payload)
     assert response.status_code == 200
-    assert "like added" in response.json()["message"]
+    comment_data = response.json()
+    assert comment_data["content"] == "Great movie!"
 
-    response = client.post(f"/movies/movies/{movie.id}/react/{ReactionType.like.value}")
+    response = await client.post(f"/movies/comments/1/react/{ReactionType.like.value}")
     assert response.status_code == 200
     assert "like added" in response.json()["message"]
-    client.post(f"/movies/movies/{movie.id}/react/{ReactionType.like.value}")
 
-    response = client.get(f"/movies/movies/{movie.id}/reactions")
+    response = await client.get(f"/movies/{movie.id}/comments")
     assert response.status_code == 200
     data = response.json()
-    assert data["likes"] == 1
+    assert len(data["items"]) >= 1
+    assert data["items"][0]["content"] == "Great movie!"
+    assert data["items"][0]["likes"] == 1
+    assert data["total_items"] == "1"
+    assert data["next_page"] is None
+
+    response = await client.delete(f"/movies/comments/{comment_data['id']}")
+    assert response.status_code == 200
+    response = await client.get(f"/movies/{movie.id}/comments")
+    assert response.json()["items"] == []
 
 
 @pytest.mark.asyncio
-async def test_add_and_list_comments_comment_reaction(client, db_session):
-    user = User(email="comment@test.com", hashed_password="pass", is_active=True, group_id=1)
+async def test_list_comments_cursor_pagination(client, db_session):
+    user = User(email="comment-pages@test.com", hashed_password="pass", is_active=True, group_id=1)
     db_session.add(user)
     await db_session.commit()
-    await db_session.refresh(user)
 
-    movie = await create_test_movie(db_session, "Comment Movie")
+    movie = await create_test_movie(db_session, "Comment Pages Movie")
 
-    from src.main import app
-    from src.routes.movies import get_current_user
     app.dependency_overrides[get_current_user] = lambda: user
 
-    payload = {"content": "Great movie!"}
-    response = client.post(f"/movies/movies/{movie.id}/comments", json=payload)
-    assert response.status_code == 200
-    comment_data = response.json()
-    assert comment_data["content"] == "Great movie!"
+    for content in ("first", "second", "third"):
+        assert (await client.post(f"/movies/{movie.id}/comments", json={"content": content})).status_code == 200
 
-    response = client.post(f"/movies/comments/1/react/{ReactionType.like.value}")
-    assert response.status_code == 200
-    assert "like added" in response.json()["message"]
+    response = await client.get(f"/movies/{movie.id}/comments?size=2")
+    data = response.json()
+    assert data["total_items"] == "3"
+    seen = [item["content"] for item in data["items"]]
 
-    response = client.get(f"/movies/movies/{movie.id}/comments")
+    response = await client.get(data["next_page"])
     assert response.status_code == 200
     data = response.json()
-    assert len(data["items"]) >= 1
-    assert data["items"][0]["content"] == "Great movie!"
-    print(data)
-    assert data["items"][0]["likes"] == 1
+    seen += [item["content"] for item in data["items"]]
+    assert data["next_page"] is None
+    assert seen == ["first", "second", "third"]
+
+
+@pytest.mark.asyncio
+async def test_list_movies_cursor_pagination(client, db_session):
+    for name in ("Cursor Movie A", "Cursor Movie B", "Cursor Movie C"):
+        await create_test_movie(db_session, name)
+
+    seen = []
+    url = "/movies/?q=Cursor Movie&limit=2&sort_by=name&order=desc"
+    while url:
+        response = await client.get(url)
+        assert response.status_code == 200
+        data = response.json()
+        seen += [movie["name"] for movie in data["movies"]]
+        url = data["next_page"]
+
+    assert seen == ["Cursor Movie C", "Cursor Movie B", "Cursor Movie A"]
+
+
+@pytest.mark.asyncio
+async def test_list_movies_rejects_bad_cursor(client):
+    response = await client.get("/movies/?after=not-a-cursor")
+    assert response.status_code == 400
+
+    # Well-formed cursors whose sort value has the wrong type for the column.
+    for sort_by, cursor in [
+        ("name", [{"a": 1}, 1]),
+        ("year", [True, 1]),
+        ("imdb", ["8.5", 1]),
+        ("price", ["NaN", 1]),
+        ("price", [9.99, 1]),
+        ("name", ["a", "1"]),
+    ]:
+        after = base64.urlsafe_b64encode(orjson.dumps(cursor)).decode()
+        response = await client.get(f"/movies/?sort_by={sort_by}&after={after}")
+        assert response.status_code == 400, (sort_by, cursor)
+
+
+@pytest.mark.asyncio
+async def test_list_movies_search_matches_related_names(client, db_session):
+    await create_test_movie(db_session, "Search Related Movie")
+
+    response = await client.get("/movies/?q=DIRECTOR 1&limit=100")
+    assert response.status_code == 200
+    names = [movie["name"] for movie in response.json()["movies"]]
+    assert "Search Related Movie" in names
+
+
+@pytest.mark.asyncio
+async def test_backfill_search_docs_makes_older_movies_searchable(client, db_session):
+    created = await create_test_movie(db_session, "Backfill Movie")
+    await db_session.execute(update(Movie).where(Movie.id == created.id).values(search_doc=""))
+    await db_session.commit()
+
+    assert await backfill_search_docs(db_session) >= 1
+
+    response = await client.get("/movies/?q=backfill movie&limit=100")
+    names = [movie["name"] for movie in response.json()["movies"]]
+    assert "Backfill Movie" in names
+    assert await db_session.scalar(select(Movie.search_doc).where(Movie.id == created.id)) == \
+        "backfill movie\na test movie\naction\nactor 1\ndirector 1"
+
+
+@pytest.mark.asyncio
+async def test_movie_detail_options_load_everything_the_schema_reads(db_session):
+    created = await create_test_movie(db_session, "Raiseload Movie")
+    db_session.expunge_all()
+
+    movie = await db_session.scalar(
+        select(Movie).options(*movie_detail_options()).where(Movie.id == created.id)
+    )
+    # Would raise InvalidRequestError if a relationship the schema reads were not eager-loaded.
+    assert MovieSchema.model_validate(movie).genres[0].name == "Action"
+    assert MovieSchema.model_validate(movie).stars[0].name == "Actor 1"
@@ -1,9 +1,8 @@
 import pytest
 
 from src.database.models.user import User
-from src.database.models.cart import Cart, CartItem
+from src.database.models.cart import Cart, CartItem, Purchase
 from src.database.models.orders import Order, OrderStatusesEnum
-from src.utils.hash import hash_password
 from src.main import app
 from src.routes.orders import get_current_user, get_current_admin
 
@@ -11,22 +10,15 @@ from src.test.test_movie import create_test_movie
 
 
 @pytest.mark.asyncio
-async def test_create_order_from_cart(client, db_session):
-    user = User(email="order_create@test.com", hashed_password=hash_password("pass"), is_active=True, group_id=1)
-    db_session.add(user)
-    await db_session.commit()
-    await db_session.refresh(user)
-    app.dependency_overrides[get_current_user] = lambda: user
-
+async def test_create_order_from_cart(client, db_session, password_hash):
     movie = await create_test_movie(db_session, "Order Movie 1")
 
-    cart = Cart(user_id=user.id)
-    db_session.add(cart)
-    await db_session.flush()
-    db_session.add(CartItem(cart_id=cart.id, movie_id=movie.id))
+    user = User(email="order_create@test.com", hashed_password=password_hash, is_active=True, group_id=1)
+    db_session.add_all([user, Cart(user=user, items=[CartItem(movie_id=movie.id)])])
     await db_session.commit()
+    app.dependency_overrides[get_current_user] = lambda: user
 
-    response = client.post("/orders/")
+    response = await client.post("/orders/")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == OrderStatusesEnum.Pending.value
@@ -34,68 +26,75 @@ async def test_create_order_from_cart(client, db_session):
 
 
 @pytest.mark.asyncio
-async def test_create_order_empty_cart(client, db_session):
-    user = User(email="order_empty@test.com", hashed_password=hash_password("pass"), is_active=True, group_id=1)
+async def test_create_order_empty_cart(client, db_session, password_hash):
+    user = User(email="order_empty@test.com", hashed_password=password_hash, is_active=True, group_id=1)
     db_session.add(user)
     await db_session.commit()
-    await db_session.refresh(user)
     app.dependency_overrides[get_current_user] = lambda: user
 
-    response = client.post("/orders/")
+    response = await client.post("/orders/")
     assert response.status_code == 404
     assert "Cart not found or is empty" in response.json()["detail"]
 
 
 @pytest.mark.asyncio
-async def test_cancel_order(client, db_session):
-    user = User(email="order_cancel@test.com", hashed_password=hash_password("pass"), is_active=True, group_id=1)
+async def test_create_order_already_purchased(client, db_session, password_hash):
+    user = User(email="order_purchased@test.com", hashed_password=password_hash, is_active=True, group_id=1)
     db_session.add(user)
     await db_session.commit()
-    await db_session.refresh(user)
     app.dependency_overrides[get_current_user] = lambda: user
 
-    movie = await create_test_movie(db_session, "Order Movie 2")
+    movie = await create_test_movie(db_session, "Order Movie Purchased")
 
-    order = Order(user_id=user.id, status=OrderStatusesEnum.Pending, total_amount=movie.price)
-    db_session.add(order)
+    cart = Cart(user_id=user.id)
+    db_session.add(cart)
     await db_session.flush()
+    db_session.add_all([CartItem(cart_id=cart.id, movie_id=movie.id), Purchase(user_id=user.id, movie_id=movie.id)])
+    await db_session.commit()
+
+    response = await client.post("/orders/")
+    assert response.status_code == 409
+    assert "already purchased" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_cancel_order(client, db_session, password_hash):
+    movie = await create_test_movie(db_session, "Order Movie 2")
+
+    user = User(email="order_cancel@test.com", hashed_password=password_hash, is_active=True, group_id=1)
+    order = Order(user=user, status=OrderStatusesEnum.Pending, total_amount=movie.price)
+    db_session.add_all([user, order])
     await db_session.commit()
-    await db_session.refresh(order)
+    app.dependency_overrides[get_current_user] = lambda: user
 
-    response = client.patch(f"/orders/{order.id}/cancel/")
+    response = await client.patch(f"/orders/{order.id}/cancel/")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == OrderStatusesEnum.Canceled.value
 
 
 @pytest.mark.asyncio
-async def test_cancel_nonexistent_order(client, db_session):
-    user = User(email="order_notfound@test.com", hashed_password=hash_password("pass"), is_active=True, group_id=1)
+async def test_cancel_nonexistent_order(client, db_session, password_hash):
+    user = User(email="order_notfound@test.com", hashed_password=password_hash, is_active=True, group_id=1)
     db_session.add(user)
     await db_session.commit()
-    await db_session.refresh(user)
     app.dependency_overrides[get_current_user] = lambda: user
 
-    response = client.patch("/orders/999/cancel/")
+    response = await client.patch("/orders/999/cancel/")
     assert response.status_code == 404
     assert "Order not found" in response.json()["detail"]
 
 
 @pytest.mark.asyncio
-async def test_get_orders(client, db_session):
-    user = User(email="order_list@test.com", hashed_password=hash_password("pass"), is_active=True, group_id=1)
-    db_session.add(user)
-    await db_session.commit()
-    await db_session.refresh(user)
-    app.dependency_overrides[get_current_user] = lambda: user
-
+async def test_get_orders(client, db_session, password_hash):
     movie = await create_test_movie(db_session, "Order Movie 3")
 
-    order = Order(user_id=user.id, status=OrderStatusesEnum.Pending, total_amount=movie.price)
-    db_session.add(order)
+    user = User(email="order_list@test.com", hashed_password=password_hash, is_active=True, group_id=1)
+    db_session.add_all([user, Order(user=user, status=OrderStatusesEnum.Pending, total_amount=movie.price)])
     await db_session.commit()
+    app.dependency_overrides[get_current_user] = lambda: user
 
-    response = client.get("/orders/")
+    response = await client.get("/orders/")
     assert response.status_code == 200
     data = response.json()
     assert isinstance(data, list)
@@ -104,37 +103,29 @@ async def test_get_orders(client, db_session):
 
 
 @pytest.mark.asyncio
-async def test_get_orders_not_found(client, db_session):
-    user = User(email="order_list_empty@test.com", hashed_password=hash_password("pass"), is_active=True, group_id=1)
+async def test_get_orders_not_found(client, db_session, password_hash):
+    user = User(email="order_list_empty@test.com", hashed_password=password_hash, is_active=True, group_id=1)
     db_session.add(user)
     await db_session.commit()
-    await db_session.refresh(user)
     app.dependency_overrides[get_current_user] = lambda: user
 
-    response = client.get("/orders/")
+    response = await client.get("/orders/")
     assert response.status_code == 404
     assert "No orders found" in response.json()["detail"]
 
 
 @pytest.mark.asyncio
-async def test_admin_get_all_orders(client, db_session):
-    admin = User(email="admin@test.com", hashed_password=hash_password("pass"), is_active=True, group_id=2)
-    db_session.add(admin)
-    await db_session.commit()
-    await db_session.refresh(admin)
-    app.dependency_overrides[get_current_admin] = lambda: admin
-
-    user = User(email="order_user@test.com", hashed_password=hash_password("pass"), is_active=True, group_id=1)
-    db_session.add(user)
-    await db_session.commit()
-    await db_session.refresh(user)
-
+async def test_admin_get_all_orders(client, db_session, password_hash):
     movie = await create_test_movie(db_session, "Admin Order Movie")
-    order = Order(user_id=user.id, status=OrderStatusesEnum.Pending, total_amount=movie.price)
-    db_session.add(order)
+
+    admin = User(email="admin@test.com", hashed_password=password_hash, is_active=True, group_id=2)
+    user = User(email="order_user@test.com", hashed_password=password_hash, is_active=True, group_id=1)
+    order = Order(user=user, status=OrderStatusesEnum.Pending, total_amount=movie.price)
+    db_session.add_all([admin, user, order])
     await db_session.commit()
+    app.dependency_overrides[get_current_admin] = lambda: admin
 
-    response = client.get("/admin/orders?sort_by=created_at&sort_order=desc")
+    response = await client.get("/admin/orders?sort_by=created_at&sort_order=desc")
     assert response.status_code == 200
     data = response.json()
     assert len(data) >= 1
@@ -142,15 +133,71 @@ async def test_admin_get_all_orders(client, db_session):
 
 
 @pytest.mark.asyncio
-async def test_admin_get_all_orders_invalid_status(client, db_session):
-    admin = User(email="admin_invalid@test.com", hashed_password=hash_password("pass"), is_active=True, group_id=2)
+async def test_admin_get_all_orders_invalid_status(client, db_session, password_hash):
+    admin = User(email="admin_invalid@test.com", hashed_password=password_hash, is_active=True, group_id=2)
     db_session.add(admin)
     await db_session.commit()
-    await db_session.refresh(admin)
     app.dependency_overrides[get_current_admin] = lambda: admin
 
-    response = client.get("/admin/orders?status=wrongstatus")
+    response = await client.get("/admin/orders?status=wrongstatus")
     assert response.status_code == 400
     assert "Invalid status" in response.json()["detail"]
 
+    assert (await client.get("/admin/orders?limit=1000")).status_code == 422
+    assert (await client.get("/admin/orders?page=0")).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_admin_get_all_orders_keyset_pagination(client, db_session, password_hash):
+    admin = User(email="admin_keyset@test.com", hashed_password=password_hash, is_active=True, group_id=2)
+    db_session.add(admin)
+    await db_session.commit()
+    app.dependency_overrides[get_current_admin] = lambda: admin
+
+    user = User(email="keyset_user@test.com", hashed_password=password_hash, is_active=True, group_id=1)
+    db_session.add(user)
+    await db_session.commit()
+
+    db_session.add_all([
+        Order(user_id=user.id, status=OrderStatusesEnum.Paid, total_amount=amount)
+        for amount in (5, 7, 9)
+    ])
+    await db_session.commit()
+
+    seen = []
+    url = f"/admin/orders?user_id={user.id}&limit=2&sort_by=total_amount"
+    while url:
+        response = await client.get(url)
+        assert response.status_code == 200
+        seen.append([order["total_amount"] for order in response.json()])
+        url = response.links.get("next", {}).get("url")
+
+    assert seen == [[9, 7], [5]]
+
+    response = await client.get(f"/admin/orders?user_id={user.id}&limit=2&exact_count=true")
+    assert response.headers["X-Total-Count"] == "3"
+
+    # A cached page comes back with the same headers and body.
+    cached = await client.get(f"/admin/orders?user_id={user.id}&limit=2&exact_count=true")
+    assert cached.headers["X-Total-Count"] == "3"
+    assert cached.headers["Link"] == response.headers["Link"]
+    assert cached.json() == response.json()
+
+
+@pytest.mark.asyncio
+async def test_admin_get_all_orders_sees_cancellation(client, db_session, password_hash):
+    admin = User(email="admin_cache@test.com", hashed_password=password_hash, is_active=True, group_id=2)
+    user = User(email="cache_user@test.com", hashed_password=password_hash, is_active=True, group_id=1)
+    db_session.add_all([admin, user])
+    await db_session.commit()
+    app.dependency_overrides[get_current_admin] = lambda: admin
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    order = Order(user_id=user.id, status=OrderStatusesEnum.Pending, total_amount=5)
+    db_session.add(order)
+    await db_session.commit()
 
+    url = f"/admin/orders?user_id={user.id}&status=pending"
+    assert (await client.get(url)).status_code == 200
+    assert (await client.patch(f"/orders/{order.id}/cancel/")).status_code == 200
+    assert (await client.get(url)).status_code == 404
@@ -1,11 +1,107 @@
+import asyncio
+import multiprocessing
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from argon2 import PasswordHasher, Type, extract_parameters
+from argon2.exceptions import InvalidHashError, VerificationError
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.config.settings import settings
+
+# Candidate Argon2id memory costs for autotuning, smallest first. Autotuning
+# only ever raises the cost above PASSWORD_HASH_MEMORY_MIB, whose default is
+# OWASP's 46 MiB minimum.
+AUTOTUNE_MEMORY_COSTS_MIB = (46, 64, 128, 256)
+ARGON2_TIME_COST = 3
+
+
+def _argon2id(memory_mib: int) -> PasswordHasher:
+    return PasswordHasher(time_cost=ARGON2_TIME_COST, memory_cost=memory_mib * 1024, parallelism=1, type=Type.ID)
+
+
+# Reused across calls so its parameters are set up once per process;
+# autotune_password_hasher() may replace it at startup.
+password_hasher = _argon2id(settings.PASSWORD_HASH_MEMORY_MIB)
+
+# Accounts created before the switch to Argon2id still carry bcrypt hashes.
+legacy_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Password hashing is CPU-bound by design; running it in worker processes keeps
+# it off the event loop and lets concurrent requests hash on separate cores.
+_hash_pool = ProcessPoolExecutor(
+    max_workers=os.cpu_count(),
+    mp_context=multiprocessing.get_context("spawn"),
+)
+
+
+def autotune_password_hasher(target_ms: int = settings.PASSWORD_HASH_TARGET_MS, trials: int = 5) -> PasswordHasher:
+    """Use the largest memory cost whose median hash time stays within ``target_ms`` on this host.
+
+    Never goes below PASSWORD_HASH_MEMORY_MIB. Blocks for several hashes, so
+    call it off the event loop.
+    """
+    global password_hasher
+    chosen = password_hasher
+    for memory_mib in AUTOTUNE_MEMORY_COSTS_MIB:
+        if memory_mib <= settings.PASSWORD_HASH_MEMORY_MIB:
+            continue
+        candidate = _argon2id(memory_mib)
+        timings = []
+        for _ in range(trials):
+            start = time.perf_counter()
+            candidate.hash("autotune")
+            timings.append((time.perf_counter() - start) * 1000)
+        if statistics.median(timings) > target_ms:
+            break
+        chosen = candidate
+    password_hasher = chosen
+    return chosen
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    if not hashed_password.startswith("$argon2"):
+        return legacy_pwd_context.verify(plain_password, hashed_password)
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except VerificationError:
+        return False
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True for legacy bcrypt hashes and Argon2 hashes weaker than the configured floor.
+
+    Compared against settings rather than the (possibly autotuned) hasher:
+    tuning is timing-based and can differ between workers and restarts, which
+    would otherwise rehash the same password back and forth on every login.
+    """
+    if not hashed_password.startswith("$argon2"):
+        return True
+    try:
+        params = extract_parameters(hashed_password)
+    except InvalidHashError:
+        return True
+    return (
+        params.type is not Type.ID
+        or params.time_cost < ARGON2_TIME_COST
+        or params.memory_cost < settings.PASSWORD_HASH_MEMORY_MIB * 1024
+    )
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    # Ship the (possibly autotuned) hasher itself; workers only hold the defaults.
+    return await loop.run_in_executor(_hash_pool, password_hasher.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    # Same pool as hashing: at most one memory-hard KDF per core at a time,
+    # instead of one per default-executor thread. Parameters come from the hash.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, verify_password, plain_password, hashed_password)
@@ -1,25 +1,51 @@
+import hashlib
+import hmac
+
 import jwt
+import orjson
 import datetime
-from typing import Tuple
+from jwt.utils import base64url_encode
+from typing import Final, Tuple
 from src.config.settings import settings
 
 ALGORITHM = "HS256"
 
+# Read once at import so token minting doesn't go through the settings model per call.
+SECRET_KEY: Final = settings.SECRET_KEY
+ACCESS_TOKEN_TTL: Final = datetime.timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+REFRESH_TOKEN_TTL: Final = datetime.timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+# A prepared key lets jwt.decode skip re-validating the raw secret (PEM/SSH
+# sniffing) on every verify.
+_VERIFY_KEY: Final = jwt.PyJWK(
+    {"kty": "oct", "k": base64url_encode(SECRET_KEY.encode()).decode(), "alg": ALGORITHM}
+)
+_ALGORITHMS: Final = [ALGORITHM]
+
+# Signing side of the same key. Every token shares one header, so its
+# segment is encoded once and only the payload and HMAC are computed per call.
+_SIGNING_KEY: Final = SECRET_KEY.encode()
+_HEADER_SEGMENT: Final = base64url_encode(orjson.dumps({"alg": ALGORITHM, "typ": "JWT"}))
+
+
+def _encode(payload: dict) -> str:
+    """HS256-sign ``payload``; the output is what ``jwt.encode`` would produce."""
+    signing_input = _HEADER_SEGMENT + b"." + base64url_encode(orjson.dumps(payload))
+    signature = hmac.new(_SIGNING_KEY, signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + base64url_encode(signature)).decode()
+
 
 def create_access_token(subject: dict, expires_delta: datetime.timedelta = None) -> str:
-    to_encode = subject.copy()
-    expire = datetime.datetime.now() + (
-                expires_delta or datetime.timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire, "type": "access"})
-    return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
+    expire = datetime.datetime.now(datetime.timezone.utc) + (expires_delta or ACCESS_TOKEN_TTL)
+    return _encode({**subject, "exp": int(expire.timestamp()), "type": "access"})
 
 
 def create_refresh_token(user_id: int) -> Tuple[str, datetime.datetime]:
-    expire = datetime.datetime.now() + datetime.timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    payload = {"user_id": user_id, "exp": expire, "type": "refresh"}
-    token = jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
+    expire = datetime.datetime.now(datetime.timezone.utc) + REFRESH_TOKEN_TTL
+    payload = {"user_id": user_id, "exp": int(expire.timestamp()), "type": "refresh"}
+    token = _encode(payload)
     return token, expire
 
 
 def decode_token(token: str) -> dict:
-    return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    return jwt.decode(token, _VERIFY_KEY, algorithms=_ALGORITHMS)
@@ -0,0 +1,20 @@
+import hashlib
+import time
+
+from cachetools import TTLCache
+
+from src.utils.jwt import decode_token
+
+# Keyed by a 16-byte digest of the token so entries stay small regardless of
+# token length. A hit skips the HMAC check; expiry is still enforced below.
+_decoded_tokens: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+
+def decode_token_cached(token: str) -> dict:
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    payload = _decoded_tokens.get(key)
+    if payload is not None and payload.get("exp", 0) > time.time():
+        return payload
+    payload = decode_token(token)
+    _decoded_tokens[key] = payload
+    return payload
@@ -0,0 +1,87 @@
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+
+from src.utils.redis_client import redis_client as _redis
+
+# Applies a like/dislike delta only while both counters of the target exist.
+# A half-present pair (one key expired first) is dropped instead, so the next
+# read refills both from the database rather than counting from zero.
+_MOVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1], KEYS[2]) == 2 then
+    redis.call('INCRBY', KEYS[1], ARGV[1])
+    redis.call('INCRBY', KEYS[2], ARGV[2])
+else
+    redis.call('DEL', KEYS[1], KEYS[2])
+end
+"""
+_move = _redis.register_script(_MOVE_SCRIPT) if _redis is not None else None
+
+
+class ReactionCounters:
+    """Like/dislike totals per target (movie, comment), kept up to date on writes.
+
+    With ``REDIS_URL`` set the totals are Redis counters shared by every
+    worker: reads are one MGET, and ``move()`` adjusts them in place instead
+    of invalidating. Without Redis they sit in a per-process TTLCache that
+    ``move()`` drops from. Either way a miss means "ask the database", and
+    the caller hands the answer back through ``backfill()``.
+    """
+
+    def __init__(self, kind: str, ttl: int):
+        self.kind = kind
+        # Bounds how long a counter can stay off after a missed update.
+        self.ttl = ttl
+        self._local: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+    def _keys(self, target_id: int) -> tuple[str, str]:
+        return f"{self.kind}:{target_id}:likes", f"{self.kind}:{target_id}:dislikes"
+
+    async def get_many(self, target_ids: list[int]) -> dict[int, dict[str, int]]:
+        """Totals for the ``target_ids`` that are cached; misses are left out."""
+        if _redis is None:
+            return {target_id: self._local[target_id] for target_id in target_ids if target_id in self._local}
+        try:
+            values = await _redis.mget([key for target_id in target_ids for key in self._keys(target_id)])
+        except RedisError:
+            return {}
+        counts = {}
+        for target_id, likes, dislikes in zip(target_ids, values[::2], values[1::2]):
+            if likes is not None and dislikes is not None:
+                counts[target_id] = {"likes": int(likes), "dislikes": int(dislikes)}
+        return counts
+
+    async def backfill(self, counts: dict[int, dict[str, int]]) -> None:
+        """Store totals just read from the database."""
+        if _redis is None:
+            self._local.update(counts)
+            return
+        try:
+            async with _redis.pipeline(transaction=False) as pipe:
+                for target_id, totals in counts.items():
+                    likes_key, dislikes_key = self._keys(target_id)
+                    # NX: a counter that appeared meanwhile has seen newer writes.
+                    pipe.set(likes_key, totals["likes"], ex=self.ttl, nx=True)
+                    pipe.set(dislikes_key, totals["dislikes"], ex=self.ttl, nx=True)
+                await pipe.execute()
+        except RedisError:
+            pass
+
+    async def move(self, target_id: int, old: str | None, new: str) -> None:
+        """Account for one reaction changing from ``old`` (None if new) to ``new``.
+
+        ``old`` and ``new`` are ``"likes"`` or ``"dislikes"``. Without Redis
+        the cached totals are just dropped.
+        """
+        if _redis is None:
+            self._local.pop(target_id, None)
+            return
+        if old == new:
+            return
+        delta = {"likes": 0, "dislikes": 0}
+        delta[new] += 1
+        if old is not None:
+            delta[old] -= 1
+        try:
+            await _move(keys=self._keys(target_id), args=[delta["likes"], delta["dislikes"]])
+        except RedisError:
+            pass
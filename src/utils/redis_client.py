@@ -0,0 +1,13 @@
+from redis import asyncio as redis
+
+from src.config.settings import settings
+
+# One client for the process; connections are opened lazily from its pool.
+# None when REDIS_URL is unset, and every Redis-backed cache falls back to
+# process-local storage.
+redis_client: redis.Redis | None = redis.from_url(settings.REDIS_URL) if settings.REDIS_URL else None
+
+
+async def close_redis() -> None:
+    if redis_client is not None:
+        await redis_client.aclose()
@@ -0,0 +1,55 @@
+from cachetools import TTLCache
+from redis.exceptions import RedisError
+
+from src.utils.redis_client import redis_client as _redis
+
+
+class ResponseCache:
+    """Serialized response bodies, in process and, with ``REDIS_URL`` set, in Redis.
+
+    The process-local tier answers repeat hits without a network round-trip;
+    Redis lets every worker share one copy and see ``clear()`` at once. Redis
+    being unreachable only costs the shared tier: lookups fall through to the
+    database as if the key had never been cached.
+    """
+
+    def __init__(self, namespace: str, maxsize: int, ttl: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> bytes | None:
+        body = self._local.get(key)
+        if body is not None or _redis is None:
+            return body
+        try:
+            body = await _redis.get(self._redis_key(key))
+        except RedisError:
+            return None
+        if body is not None:
+            self._local[key] = body
+        return body
+
+    async def set(self, key: str, body: bytes) -> None:
+        self._local[key] = body
+        if _redis is None:
+            return
+        try:
+            await _redis.set(self._redis_key(key), body, ex=self.ttl)
+        except RedisError:
+            pass
+
+    async def clear(self) -> None:
+        """Drop every entry; other workers' local tiers catch up within the TTL."""
+        self._local.clear()
+        if _redis is None:
+            return
+        try:
+            keys = [key async for key in _redis.scan_iter(match=self._redis_key("*"), count=1000)]
+            if keys:
+                await _redis.unlink(*keys)
+        except RedisError:
+            pass